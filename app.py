@@ -1,131 +1,313 @@
+import io
 import os
+import re
+import gzip
+import json
+import time
+import atexit
+from collections import OrderedDict
 os.environ.setdefault("EVENTLET_NO_GREENDNS", "yes")
 import eventlet
 eventlet.monkey_patch()
 
-import json
-from datetime import datetime, timezone
-import re
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO
+from flask import Blueprint, Flask, Response, g, render_template, request, jsonify
+from werkzeug.local import LocalProxy
+from flask_socketio import SocketIO, join_room, leave_room
+
+import db
+import metrics
+import replay
+import scoring
+from profiler import sampler
+from competitions import Competitions
+from broadcast import ADMIN_ROOM, ALL_ROOM, PUBLIC_ROOMS, room_name, valid_room
 
 # ---- Config ----
-DATA_PATH = os.environ.get("DATA_PATH", "data.json")  # On Render, point this at your Disk mount (e.g. /data/data.json)
+# Data lives in ${DATA_DIR}/bakeoff.sqlite3, plus ${DATA_DIR}/competitions/<id>.sqlite3 for each extra
+# competition (see db.py). DATA_PATH is the pre-SQLite JSON file; if it exists it is imported once
+# into an empty default competition.
+DATA_PATH = os.environ.get("DATA_PATH", "data.json")
 ADMIN_PASSWORD = os.environ.get("ADMIN_PASSWORD", "")  # optional: if set, /admin will prompt
-
-DEFAULT_PARTICIPANTS = [
-    {"id": "yesenia", "name": "Yesenia", "dessert": "—"},
-    {"id": "bryan", "name": "Bryan", "dessert": "—"},
-    {"id": "lindsay", "name": "Lindsay", "dessert": "—"},
-    {"id": "javier", "name": "Javier", "dessert": "—"},
-    {"id": "vivana", "name": "Vivana", "dessert": "—"},
-    {"id": "bernie", "name": "Bernie", "dessert": "—"},
-    {"id": "daniella", "name": "Daniella", "dessert": "—"},
-    {"id": "rogelio", "name": "Rogelio", "dessert": "—"},
-]
-
-def _init_data():
-    return {
-        "participants": DEFAULT_PARTICIPANTS,
-        "scores": [],  # list of {participantId, judge, taste, presentation, spirit, total, comments, createdAt}
-        "meta": {"createdAt": datetime.now(timezone.utc).isoformat()},
-    }
-
-def load_data():
-    if not os.path.exists(DATA_PATH):
-        data = _init_data()
-        save_data(data)
-        return data
-    with open(DATA_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def save_data(data):
-    os.makedirs(os.path.dirname(DATA_PATH) or ".", exist_ok=True)
-    tmp_path = DATA_PATH + ".tmp"
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-    os.replace(tmp_path, DATA_PATH)
+GZIP_MIN_BYTES = int(os.environ.get("GZIP_MIN_BYTES", "1024"))  # smaller JSON responses aren't worth compressing
+SCORE_BATCH_MAX = int(os.environ.get("SCORE_BATCH_MAX", "500"))  # scores accepted per /api/scores/batch request
+# Needed to run more than one worker: redis://host:6379/0, or "sqlite" for a queue file in DATA_DIR (one machine only).
+MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE", "")
 
 # ---- App ----
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "bakeoff-secret")
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
+if MESSAGE_QUEUE.startswith("sqlite"):
+    from broker import SQLiteManager
+    queue_options = {"client_manager": SQLiteManager(MESSAGE_QUEUE)}
+elif MESSAGE_QUEUE:
+    queue_options = {"message_queue": MESSAGE_QUEUE}  # redis:// and friends, handled by Flask-SocketIO
+else:
+    queue_options = {}
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet", **queue_options)
+# Each competition's Store is loaded on first use; every request reads from memory.
+# With a queue, other workers share the databases too.
+competitions = Competitions(socketio, shared=bool(MESSAGE_QUEUE), legacy_path=DATA_PATH)
+competitions.get(db.DEFAULT_COMPETITION)
+atexit.register(competitions.close)
+
+# Every page and API route below is served both at / (the default competition) and at
+# /c/<competition>/ (any other); `store` is the Store of the competition being requested.
+bp = Blueprint("bakeoff", __name__)
+store = LocalProxy(lambda: g.store)
+
+@bp.url_value_preprocessor
+def pull_competition(endpoint, values):
+    g.competition = (values or {}).pop("competition", db.DEFAULT_COMPETITION)
+
+@bp.before_request
+def load_competition():
+    try:
+        g.store = competitions.get(g.competition)
+    except KeyError:
+        return jsonify(success=False, error="Unknown competition"), 404
+
+def base_path():
+    return "" if g.competition == db.DEFAULT_COMPETITION else f"/c/{g.competition}"
+
+# Serialized read responses, keyed by competition and name and reused until store.seq
+# (bumped by every mutation) moves on. Names include client input (?scores=N), so the cache is an
+# LRU of at most RESPONSE_CACHE_SIZE entries, and a competition's stale versions are dropped as
+# soon as a newer one is built.
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "64"))
+_response_cache = OrderedDict()
+
+def cached_json(key, build):
+    store.sync()
+    version = store.seq
+    etag = f"{g.competition}-{key}-{version}"
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304)
+    else:
+        entry = _response_cache.get((g.competition, key))
+        if entry is not None and entry[0] == version:
+            _response_cache.move_to_end((g.competition, key))
+        else:
+            for k in [k for k, e in _response_cache.items() if k[0] == g.competition and e[0] != version]:
+                del _response_cache[k]
+            data = build()
+            started = time.perf_counter()
+            body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+            gzipped = gzip.compress(body, 6) if len(body) >= GZIP_MIN_BYTES else None
+            entry = _response_cache[(g.competition, key)] = (version, body, gzipped)
+            while len(_response_cache) > RESPONSE_CACHE_SIZE:
+                _response_cache.popitem(last=False)
+            kind = key.split("-")[0]  # "state-20" and "state-50" are one series
+            metrics.SERIALIZE_SECONDS.observe(time.perf_counter() - started, kind)
+            metrics.SERIALIZE_BYTES.observe(len(body), kind)
+        if entry[2] is not None and "gzip" in request.accept_encodings:
+            resp = Response(entry[2], mimetype="application/json")
+            resp.headers["Content-Encoding"] = "gzip"
+        else:
+            resp = Response(entry[1], mimetype="application/json")
+    resp.set_etag(etag, weak=True)
+    resp.headers["Cache-Control"] = "no-cache"  # always revalidate; a 304 costs no encoding at all
+    resp.headers["Vary"] = "Accept-Encoding"
+    return resp
+
+# ---- Metrics ----
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+
+@app.after_request
+def record_latency(resp):
+    started = g.pop("started", None)
+    if started is not None:
+        # Labelled by route pattern (/api/score), never the raw path, so the series stay few.
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.HTTP_SECONDS.observe(time.perf_counter() - started, route, request.method, str(resp.status_code))
+    return resp
 
-@app.route("/")
+def _socket_clients():
+    # Connected to this worker, by competition and room of broadcast.py ("*" = the whole competition).
+    rooms = socketio.server.manager.rooms.get("/", {})
+    counts = {("", "connected"): len(rooms.get(None, ()))}
+    for s in competitions.loaded():
+        for room in (ALL_ROOM, ADMIN_ROOM) + PUBLIC_ROOMS:
+            counts[(s.competition, room)] = len(rooms.get(room_name(s.competition, room), ()))
+    return counts
+
+metrics.Gauge(
+    "bakeoff_socket_clients", "Socket.IO clients connected to this worker, by room.", ("competition", "room"), fn=_socket_clients
+)
+metrics.Gauge(
+    "bakeoff_scores", "Scores held in memory.", ("competition",),
+    fn=lambda: {(s.competition,): len(s.scores) for s in competitions.loaded()},
+)
+metrics.Gauge(
+    "bakeoff_change_seq", "Last change sequence number seen by this worker.", ("competition",),
+    fn=lambda: {(s.competition,): s.seq for s in competitions.loaded()},
+)
+metrics.Gauge("bakeoff_db_pools_open", "Competition databases with open connections.", fn=lambda: len(db.pools))
+
+@app.route("/metrics")
+def prometheus_metrics():
+    if not metrics.METRICS_ENABLED:
+        return jsonify(success=False, error="Metrics are disabled"), 404
+    # Scrapers that can't send X-Admin-Password can use a bearer token with the same value.
+    if ADMIN_PASSWORD and not (is_admin() or request.headers.get("Authorization") == f"Bearer {ADMIN_PASSWORD}"):
+        return jsonify(success=False, error="Admin password required"), 401
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+@bp.route("/")
 def index():
-    return render_template("index.html")
+    # Each worker keeps its own Engine.IO sessions, so without sticky sessions only websockets work.
+    return render_template("index.html", websocket_only=bool(MESSAGE_QUEUE), base=base_path(), competition=g.competition)
 
-@app.route("/admin")
+@bp.route("/admin")
 def admin():
     # Admin password is optional; if set, the page will require it (handled in admin.js).
-    return render_template("admin.html", require_password=bool(ADMIN_PASSWORD))
+    return render_template(
+        "admin.html",
+        require_password=bool(ADMIN_PASSWORD),
+        websocket_only=bool(MESSAGE_QUEUE),
+        base=base_path(),
+        competition=g.competition,
+    )
 
-@app.route("/api/state")
+@bp.route("/api/state")
 def state():
-    return jsonify(load_data())
+    # ?scores=N keeps only the newest N scores; older ones come from /api/scores a page at a time.
+    recent = request.args.get("scores", type=int)
+    if recent is None:
+        return cached_json("state", store.snapshot)
+    recent = max(0, recent)
+    return cached_json(f"state-{recent}", lambda: store.snapshot(recent))
+
+@bp.route("/api/scores")
+def scores_page():
+    # Keyset pagination: pass the previous page's `next` as ?before= to continue.
+    return jsonify(store.scores_page(
+        request.args.get("before", type=int),
+        request.args.get("limit", type=int, default=50),
+        request.args.get("participantId", type=int),
+    ))
+
+@bp.route("/api/changes")
+def changes():
+    # Catch-up for clients that noticed a gap in the sequence numbers.
+    since = request.args.get("since", type=int, default=0)
+    store.sync()
+    missed = store.changes_since(since)
+    if missed is None:
+        return jsonify(reset=True, seq=store.seq, state=store.snapshot())
+    return jsonify(reset=False, seq=store.seq, changes=missed)
+
+@bp.route("/api/leaderboard")
+def leaderboard():
+    return cached_json("leaderboard", store.leaderboard)
+
+@bp.route("/api/leaderboard/at")
+def leaderboard_at():
+    # ?at=<event id or ISO time, UTC if no offset>: the standings as they were then, replayed from a snapshot.
+    try:
+        with db.read(g.competition) as conn:
+            return jsonify(replay.leaderboard_at(conn, request.args.get("at")))
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 404
 
-@app.route("/api/participants", methods=["POST"])
+@bp.route("/api/leaderboard/lead-changes")
+def lead_changes():
+    # Each time first place changed hands between ?since= and ?until= (ids or times), for the recap animation.
+    try:
+        with db.read(g.competition) as conn:
+            return jsonify(replay.lead_changes(conn, request.args.get("since"), request.args.get("until")))
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 404
+
+@bp.route("/api/participants", methods=["POST"])
 def update_participants():
-    data = load_data()
     participants = request.json or []
-    # normalize / ensure ids
     norm = []
     for p in participants:
-        pid = (p.get("id") or "").strip() or (p.get("name","").strip().lower().replace(" ", "-"))
-        pid = re.sub(r"[^a-z0-9\-]+", "", pid)
-        norm.append({
-            "id": pid,
-            "name": (p.get("name") or "").strip() or pid,
-            "dessert": (p.get("dessert") or "").strip() or "—"
-        })
-    data["participants"] = norm
-    save_data(data)
-    socketio.emit("update", data)
+        name = (p.get("name") or "").strip()
+        if not name:
+            continue
+        try:
+            pid = int(p.get("id"))
+        except (TypeError, ValueError):
+            pid = None  # new row from the admin table
+        norm.append({"id": pid, "name": name, "dessert": (p.get("dessert") or "").strip() or "—"})
+    try:
+        store.set_participants(norm)
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 400
     return jsonify(success=True)
 
-@app.route("/api/score", methods=["POST"])
-def submit_score():
-    payload = request.json or {}
-    data = load_data()
+def clamp_int(x):
+    try:
+        x = int(float(x))
+    except Exception:
+        x = 0
+    return max(1, min(10, x))
 
-    participant_id = payload.get("participantId") or ""
-    judge = (payload.get("judge") or "").strip()
-    comments = (payload.get("comments") or "").strip()
+def score_record(payload):
+    """Validate one submitted score; returns (record, None) or (None, error)."""
+    try:
+        participant_id = int(payload.get("participantId"))
+    except (TypeError, ValueError):
+        return None, "Unknown participant"
+    judge = str(payload.get("judge") or "").strip()
+    comments = str(payload.get("comments") or "").strip()
 
-    def clamp_int(x):
-        try:
-            x = int(float(x))
-        except Exception:
-            x = 0
-        return max(1, min(10, x))
-
-    taste = clamp_int(payload.get("taste"))
-    presentation = clamp_int(payload.get("presentation"))
-    spirit = clamp_int(payload.get("spirit"))
-    total = round((taste + presentation + spirit) / 3.0, 2)
-
-    # basic validation
-    known_ids = {p["id"] for p in data.get("participants", [])}
-    if participant_id not in known_ids:
-        return jsonify(success=False, error="Unknown participant"), 400
+    # basic validation (participant, voting and duplicate checks happen inside the store's commit)
     if not judge:
-        return jsonify(success=False, error="Judge name required"), 400
+        return None, "Judge name required"
+    client_id = str(payload.get("clientId") or "").strip()[:64] or None  # lets retries be recognized
 
-    record = {
-        "id": payload.get("id") or f"s_{int(datetime.now(timezone.utc).timestamp()*1000)}",
+    return {
         "participantId": participant_id,
         "judge": judge,
-        "taste": taste,
-        "presentation": presentation,
-        "spirit": spirit,
-        "total": total,
+        "taste": clamp_int(payload.get("taste")),
+        "presentation": clamp_int(payload.get("presentation")),
+        "spirit": clamp_int(payload.get("spirit")),
         "comments": comments,
-        "createdAt": datetime.now(timezone.utc).isoformat(),
-    }
-    data["scores"].append(record)
-    save_data(data)
-    socketio.emit("update", data)
-    return jsonify(success=True, total=total)
+        "clientId": client_id,
+    }, None
+
+@bp.route("/api/score", methods=["POST"])
+def submit_score():
+    payload = request.json or {}
+    record, error = score_record(payload) if isinstance(payload, dict) else (None, "Expected a score object")
+    if error:
+        return jsonify(success=False, error=error), 400
+    try:
+        score = store.add_score(record)
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 400
+    return jsonify(success=True, id=score["id"], total=score["total"], duplicate=score.get("duplicate", False))
+
+@bp.route("/api/scores/batch", methods=["POST"])
+def submit_scores_batch():
+    # Many scores in one request and one transaction; each gets its own result, in order.
+    payload = request.json or {}
+    items = payload.get("scores") if isinstance(payload, dict) else payload
+    if not isinstance(items, list):
+        return jsonify(success=False, error="Expected a list of scores"), 400
+    if len(items) > SCORE_BATCH_MAX:
+        return jsonify(success=False, error=f"At most {SCORE_BATCH_MAX} scores per batch"), 400
+    results = [None] * len(items)
+    records, slots = [], []
+    for i, item in enumerate(items):
+        record, error = score_record(item) if isinstance(item, dict) else (None, "Expected a score object")
+        if error:
+            results[i] = {"success": False, "error": error}
+        else:
+            records.append(record)
+            slots.append(i)
+    for i, outcome in zip(slots, store.add_scores(records) if records else []):
+        if isinstance(outcome, Exception):
+            results[i] = {"success": False, "error": str(outcome)}
+        else:
+            results[i] = {"success": True, "id": outcome["id"], "total": outcome["total"], "duplicate": outcome.get("duplicate", False)}
+    for item, result in zip(items, results):
+        result["clientId"] = item.get("clientId") if isinstance(item, dict) else None
+    return jsonify(success=True, results=results)
 
 @app.route("/api/admin/auth", methods=["POST"])
 def admin_auth():
@@ -136,5 +318,228 @@ def admin_auth():
     pw = payload.get("password") or ""
     return jsonify(success=(pw == ADMIN_PASSWORD))
 
+def is_admin():
+    # Admin-only API calls send the unlocked password back in X-Admin-Password.
+    return not ADMIN_PASSWORD or request.headers.get("X-Admin-Password", "") == ADMIN_PASSWORD
+
+NDJSON_START = re.compile(rb'\s*\{\s*"section"\s*:')
+
+@bp.route("/api/admin/import", methods=["POST"])
+def admin_import():
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    mode = request.args.get("mode") or request.form.get("mode") or "replace"
+    upload = request.files.get("file")
+    filename = (upload.filename if upload else request.args.get("filename")) or "file"
+    # Parsed incrementally, so a large backup is never held in memory as one document.
+    raw = io.BufferedReader(upload.stream if upload else request.stream)
+    if raw.peek(2)[:2] == b"\x1f\x8b":  # gzipped backup
+        raw = io.BufferedReader(gzip.GzipFile(fileobj=raw))
+    # Whatever the file is called: an ndjson export's first line is a {"section": ...} record.
+    fmt = request.args.get("format") or ("ndjson" if NDJSON_START.match(raw.peek(256)) else "json")
+    stream = io.TextIOWrapper(raw, encoding="utf-8")
+    try:
+        report = store.import_file(stream, mode, fmt)
+    except ValueError as e:
+        return jsonify(success=False, error=f"Could not read {filename}: {e}"), 400
+    return jsonify(success=True, report=report)
+
+@bp.route("/api/admin/export")
+def admin_export():
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    fmt = "ndjson" if request.args.get("format") == "ndjson" else "json"
+    compress = request.args.get("gzip") in ("1", "true", "yes")
+    filename = f"{g.competition if base_path() else 'bakeoff'}-export.{fmt}" + (".gz" if compress else "")
+    # Rows are streamed from a database cursor as they are read; nothing is built up in memory.
+    return Response(
+        db.stream_export(fmt, compress, g.competition),
+        mimetype="application/gzip" if compress else ("application/x-ndjson" if fmt == "ndjson" else "application/json"),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@bp.route("/api/admin/events")
+def admin_events():
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    with db.read(g.competition) as conn:
+        events, cursor = db.page_events(
+            conn,
+            request.args.get("before", type=int),
+            request.args.get("limit", type=int, default=50),
+            request.args.get("type"),
+        )
+    return jsonify(events=events, next=cursor)
+
+@bp.route("/api/admin/maintenance", methods=["POST"])
+def admin_maintenance():
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    return jsonify(success=True, report=db.run_retention(competition=g.competition))
+
+@bp.route("/api/admin/rebuild-summary", methods=["POST"])
+def admin_rebuild_summary():
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    try:
+        return jsonify(success=True, report=store.rebuild_summary())
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 400
+
+@bp.route("/api/admin/backup", methods=["POST"])
+def admin_backup():
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    report = db.create_backup(g.competition)
+    return jsonify(success=True, path=report["path"], report=report)
+
+@bp.route("/api/admin/db")
+def admin_download_db():
+    # The SQLite file itself, copied online and streamed (?gzip=1 to compress on the way out).
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    compress = request.args.get("gzip") in ("1", "true", "yes")
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+    filename = f"{g.competition if base_path() else 'bakeoff'}-{stamp}.sqlite3" + (".gz" if compress else "")
+    return Response(
+        db.stream_db(g.competition, compress),
+        mimetype="application/gzip" if compress else "application/vnd.sqlite3",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@bp.route("/api/admin/scoring", methods=["GET", "POST"])
+def admin_scoring():
+    # POST {"mode": "average"|"weighted"|"zscore"|"trimmed", "trim": 0.1}; see scoring.py.
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    if request.method == "POST":
+        payload = request.json or {}
+        try:
+            store.set_scoring(payload.get("mode"), payload.get("trim"))
+        except (TypeError, ValueError) as e:
+            return jsonify(success=False, error=str(e)), 400
+    return jsonify(success=True, modes=scoring.available_modes(), **store.scoring)
+
+@app.route("/api/competitions")
+def list_competitions():
+    return jsonify(competitions=[
+        dict(c, url="/" if c["id"] == db.DEFAULT_COMPETITION else f"/c/{c['id']}/") for c in competitions.list()
+    ])
+
+@app.route("/api/admin/competitions", methods=["POST"])
+def create_competition():
+    # {"id": "office", "name": "Office Bakeoff"}: a new, empty competition served at /c/office/.
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    payload = request.json or {}
+    competition = str(payload.get("id") or "").strip().lower()
+    try:
+        competitions.create(competition, str(payload.get("name") or "").strip())
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 400
+    return jsonify(success=True, id=competition, url=f"/c/{competition}/")
+
+@app.route("/api/admin/profiler", methods=["GET", "POST"])
+def admin_profiler():
+    # Sampling profiler for this worker: POST {"action": "start"|"stop", "intervalMs": 5}; GET for the report.
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    if request.method == "POST":
+        payload = request.json or {}
+        if payload.get("action") == "start":
+            try:
+                sampler.start(payload.get("intervalMs"))
+            except (TypeError, ValueError):
+                return jsonify(success=False, error="intervalMs must be a number"), 400
+        elif payload.get("action") == "stop":
+            sampler.stop()
+        else:
+            return jsonify(success=False, error="action must be start or stop"), 400
+    return jsonify(success=True, pid=os.getpid(), profile=sampler.report())
+
+@app.route("/api/admin/profiler/folded")
+def admin_profiler_folded():
+    if not is_admin():
+        return jsonify(success=False, error="Admin password required"), 401
+    return Response(
+        sampler.folded(),
+        mimetype="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="bakeoff-profile-{os.getpid()}.folded"'},
+    )
+
+# ---- Retention ----
+RETENTION_INTERVAL = float(os.environ.get("RETENTION_INTERVAL_HOURS", "6")) * 3600  # 0 = only on demand
+
+def retention_loop():
+    # Archive old events and compact the database now and then; see db.run_retention. Every worker
+    # runs this loop, and db.claim_run lets one of them do each round.
+    while True:
+        socketio.sleep(RETENTION_INTERVAL)
+        for competition in db.list_competition_ids():
+            try:
+                with db.connect(competition) as conn:
+                    if not db.claim_run(conn, "retention", RETENTION_INTERVAL):
+                        continue  # another worker is on it
+                app.logger.info("retention %s: %s", competition, db.run_retention(competition=competition))
+            except Exception:
+                app.logger.exception("retention run failed for %s", competition)
+
+if RETENTION_INTERVAL > 0:
+    socketio.start_background_task(retention_loop)
+
+# ---- Scheduled backups ----
+BACKUP_INTERVAL = float(os.environ.get("BACKUP_INTERVAL_MINUTES", "30")) * 60  # 0 = only on demand
+
+def backup_loop():
+    # An online copy of every competition that changed since its last one; see db.create_backup.
+    # Every worker runs this loop; db.claim_run lets one of them do each round, and the seq last
+    # backed up is kept in the database so whichever worker wins knows whether anything changed.
+    while True:
+        socketio.sleep(BACKUP_INTERVAL)
+        for competition in db.list_competition_ids():
+            try:
+                with db.connect(competition) as conn:
+                    seq = db.get_change_seq(conn)
+                    if db.get_settings(conn).get("backup_seq") == str(seq):
+                        continue
+                    if not db.claim_run(conn, "backup", BACKUP_INTERVAL):
+                        continue  # another worker is on it
+                report = db.create_backup(competition)
+                with db.connect(competition) as conn:
+                    db.set_setting(conn, "backup_seq", seq)
+                app.logger.info("backup %s: %s", competition, report)
+            except Exception:
+                app.logger.exception("backup failed for %s", competition)
+
+if BACKUP_INTERVAL > 0:
+    socketio.start_background_task(backup_loop)
+
+# ---- Live update subscriptions ----
+@socketio.on("subscribe")
+def subscribe(data):
+    # {"competition": "office", "rooms": [...]}; every subscriber also gets the competition-wide events.
+    data = data or {}
+    competition = data.get("competition") or db.DEFAULT_COMPETITION
+    try:
+        competitions.get(competition)  # loads it, so its broadcaster is running
+    except KeyError:
+        return {"rooms": [], "error": "Unknown competition"}
+    rooms = [r for r in data.get("rooms") or [] if valid_room(r)]
+    if ADMIN_ROOM in rooms and ADMIN_PASSWORD and data.get("password") != ADMIN_PASSWORD:
+        rooms.remove(ADMIN_ROOM)
+    for room in [ALL_ROOM] + rooms:
+        join_room(room_name(competition, room))
+    return {"competition": competition, "rooms": rooms}
+
+@socketio.on("unsubscribe")
+def unsubscribe(data):
+    data = data or {}
+    competition = data.get("competition") or db.DEFAULT_COMPETITION
+    for room in data.get("rooms") or []:
+        leave_room(room_name(competition, room))
+
+app.register_blueprint(bp)
+app.register_blueprint(bp, url_prefix="/c/<competition>", name="competition")
+
 if __name__ == "__main__":
     socketio.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,85 @@
+"""Per-request database latency: fresh connection per call vs the pool.
+
+"fresh" reproduces the old db.connect(): sqlite3.connect + three PRAGMAs +
+close around every request. "pooled" borrows the long-lived connections
+through db.read()/db.connect(). Both run the same read (settings + roster, what a
+page load needs) and write (add_score) against a scratch database.
+
+    python bench/db_latency.py --n 2000
+"""
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import statistics
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp())
+
+import db  # noqa: E402
+
+
+@contextmanager
+def fresh_connect():
+    conn = sqlite3.connect(db.db_path(), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def timed(n, fn):
+    samples = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return statistics.mean(samples), samples[len(samples) // 2], samples[int(len(samples) * 0.99) - 1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--n", type=int, default=2000)
+    args = ap.parse_args()
+
+    db.init_db()
+    with db.connect() as conn:
+        db.set_setting(conn, "allow_multiple_scores_per_judge", True)
+        pid = db.upsert_participant(conn, "Bench")["id"]
+    criteria = {"taste": 7, "presentation": 8, "spirit": 9}
+
+    def read(ctx):
+        def run(_):
+            with ctx() as conn:
+                db.get_settings(conn)
+                db.list_participants(conn)
+        return run
+
+    def write(ctx):
+        def run(i):
+            with ctx() as conn:
+                db.add_score(conn, pid, f"judge-{i}", criteria)
+        return run
+
+    print(f"{'case':<16}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, fn in (
+        ("read fresh", read(fresh_connect)),
+        ("read pooled", read(db.read)),
+        ("write fresh", write(fresh_connect)),
+        ("write pooled", write(db.connect)),
+    ):
+        mean, p50, p99 = timed(args.n, fn)
+        print(f"{name:<16}{mean:>10.3f}{p50:>10.3f}{p99:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""Load test: judges submitting scores, viewers watching live updates, admins editing the roster.
+
+Starts app.py on a scratch DATA_DIR (or targets --url) and runs, all at
+once until the judges are done:
+
+  * --judges threads posting to /api/score (--scores in total, optionally
+    capped at --rate per judge per second)
+  * --viewers Socket.IO clients in the "activity" and "leaderboard" rooms,
+    timing each score from its POST to its arrival (broadcast lag)
+  * --admins threads re-saving the roster through /api/participants every
+    --admin-every seconds and reloading /api/state
+
+While it runs, a line per --report-every seconds shows throughput, latency,
+lag and the server's memory (from /metrics). At the end it prints latency
+percentiles per kind of request, checks that every accepted score is
+stored and was delivered, and with --save/--baseline writes or compares a
+JSON summary, exiting non-zero when a run is more than --tolerance worse.
+
+    pip install "python-socketio[client]"
+    python bench/loadtest.py --scenario event
+    python bench/loadtest.py --scenario event --save bench-baseline.json
+    python bench/loadtest.py --scenario event --baseline bench-baseline.json
+    python bench/loadtest.py --judges 10 --viewers 5 --scores 500 --rate 5
+
+Scenarios (flags given explicitly override them):
+    smoke  8 judges, 5 viewers, 1 admin, 500 scores
+    event  40 judges, 50 viewers, 2 admins, 10,000 scores
+    soak   40 judges, 100 viewers, 2 admins, 50,000 scores, 20 scores/s per judge
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from stress_scores import free_port, start_server  # noqa: E402
+
+SCENARIOS = {
+    "smoke": {"judges": 8, "viewers": 5, "admins": 1, "scores": 500, "rate": 0},
+    "event": {"judges": 40, "viewers": 50, "admins": 2, "scores": 10000, "rate": 0},
+    "soak": {"judges": 40, "viewers": 100, "admins": 2, "scores": 50000, "rate": 20},
+}
+# Compared against --baseline: (key, True if higher is better)
+COMPARED = [
+    ("scores_per_sec", True),
+    ("score_p99_ms", False),
+    ("lag_p95_ms", False),
+    ("peak_rss_mb", False),
+]
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class Client:
+    def __init__(self, url, password=""):
+        self.url = url
+        self.headers = {"Content-Type": "application/json"}
+        if password:
+            self.headers["X-Admin-Password"] = password
+
+    def request(self, path, payload=None, timeout=30):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.url + path, data=data, headers=self.headers)
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            body = r.read()
+        return json.loads(body) if r.headers.get_content_type() == "application/json" else body.decode()
+
+
+class Recorder:
+    """Latencies and counts shared by every simulated client."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}  # kind -> [seconds]
+        self.errors = {}
+        self.lags = []
+        self.accepted = set()
+        self.delivered = {}  # score id -> viewers that received it
+        self.leaderboard_frames = 0
+        self.disconnects = 0
+
+    def timed(self, kind, fn):
+        t = time.perf_counter()
+        try:
+            result = fn()
+        except Exception:
+            with self.lock:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+            return None
+        with self.lock:
+            self.latency.setdefault(kind, []).append(time.perf_counter() - t)
+        return result
+
+
+def judges(client, rec, pids, args, stop):
+    counter = iter(range(args.scores))
+    counter_lock = threading.Lock()
+
+    def judge(j):
+        interval = 1.0 / args.rate if args.rate else 0
+        while not stop.is_set():
+            with counter_lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.time()
+            res = rec.timed("score", lambda: client.request("/api/score", {
+                "participantId": pids[i % len(pids)],
+                "judge": f"load-{j}-{i}",  # one score per judge name, so nothing is rejected as a repeat
+                "taste": 1 + i % 10, "presentation": 1 + (i * 7) % 10, "spirit": 1 + (i * 3) % 10,
+                "comments": repr(started),  # viewers read the send time back out of the live update
+            }))
+            if res and res.get("success"):
+                with rec.lock:
+                    rec.accepted.add(res["id"])
+            if interval:
+                time.sleep(max(0.0, started + interval - time.time()))
+
+    with ThreadPoolExecutor(args.judges) as ex:
+        list(ex.map(judge, range(args.judges)))
+
+
+def connect_viewers(url, rec, n):
+    import socketio  # python-socketio[client]
+
+    clients = []
+    for _ in range(n):
+        sio = socketio.Client(reconnection=False)
+
+        @sio.on("scores")
+        def on_scores(msg):
+            now = time.time()
+            with rec.lock:
+                for s in msg["scores"]:
+                    rec.lags.append(now - float(s["comments"] or now))
+                    rec.delivered[s["id"]] = rec.delivered.get(s["id"], 0) + 1
+
+        @sio.on("leaderboard")
+        def on_leaderboard(msg):
+            with rec.lock:
+                rec.leaderboard_frames += 1
+
+        @sio.on("disconnect")
+        def on_disconnect(*reason):
+            with rec.lock:
+                rec.disconnects += 1
+
+        sio.connect(url, transports=["websocket"])
+        sio.call("subscribe", {"rooms": ["activity", "leaderboard"]})
+        clients.append(sio)
+    return clients
+
+
+def admin(client, rec, args, stop):
+    n = 0
+    while not stop.wait(args.admin_every):
+        state = rec.timed("state", lambda: client.request("/api/state?scores=20"))
+        if not state:
+            continue
+        n += 1
+        roster = [{**p, "dessert": f"{p['name']}'s cake #{n}"} for p in state["participants"]]
+        rec.timed("participants", lambda: client.request("/api/participants", roster))
+
+
+def server_rss(client):
+    try:
+        text = client.request("/metrics", timeout=5)
+    except Exception:
+        return None
+    for line in text.splitlines():
+        if line.startswith("bakeoff_process_resident_memory_bytes "):
+            return float(line.split()[1]) / 1e6
+    return None
+
+
+def monitor(client, rec, args, stop, samples):
+    started = time.time()
+    last = (0, 0)  # accepted, lags seen at the previous line
+    print(f"{'t':>5} {'scores/s':>9} {'post p95':>9} {'lag p95':>9} {'rss MB':>7}")
+    while not stop.wait(args.report_every):
+        with rec.lock:
+            accepted, lags = len(rec.accepted), rec.lags[last[1]:]
+            posts = rec.latency.get("score", [])[-(accepted - last[0]):] if accepted > last[0] else []
+        rss = server_rss(client)
+        elapsed = time.time() - started
+        samples.append({"t": round(elapsed, 1), "accepted": accepted, "rss_mb": rss})
+        print(
+            f"{elapsed:5.0f} {(accepted - last[0]) / args.report_every:9.0f} "
+            f"{pct(posts, 95) * 1000:7.1f}ms {pct(lags, 95) * 1000:7.1f}ms {rss or 0:7.1f}"
+        )
+        last = (accepted, last[1] + len(lags))
+
+
+def summarize(rec, args, elapsed, samples):
+    summary = {
+        "scenario": args.scenario,
+        "judges": args.judges,
+        "viewers": args.viewers,
+        "admins": args.admins,
+        "scores": args.scores,
+        "accepted": len(rec.accepted),
+        "errors": rec.errors,
+        "seconds": round(elapsed, 2),
+        "scores_per_sec": round(len(rec.accepted) / elapsed, 1),
+        "lag_p50_ms": round(pct(rec.lags, 50) * 1000, 1),
+        "lag_p95_ms": round(pct(rec.lags, 95) * 1000, 1),
+        "lag_p99_ms": round(pct(rec.lags, 99) * 1000, 1),
+        "delivered": sum(rec.delivered.values()),
+        "expected_deliveries": len(rec.accepted) * args.viewers,
+        "leaderboard_frames": rec.leaderboard_frames,
+        "viewer_disconnects": rec.disconnects,
+        "peak_rss_mb": round(max((s["rss_mb"] or 0 for s in samples), default=0), 1),
+        "timeline": samples,
+    }
+    for kind, values in rec.latency.items():
+        for p in (50, 95, 99):
+            summary[f"{kind}_p{p}_ms"] = round(pct(values, p) * 1000, 1)
+    return summary
+
+
+def report(summary):
+    print()
+    print(f"{summary['accepted']}/{summary['scores']} scores in {summary['seconds']}s = {summary['scores_per_sec']} scores/s"
+          + (f", errors {summary['errors']}" if summary["errors"] else ""))
+    for kind in ("score", "state", "participants"):
+        if f"{kind}_p50_ms" in summary:
+            print(f"  {kind:<13} p50={summary[f'{kind}_p50_ms']:7.1f}ms p95={summary[f'{kind}_p95_ms']:7.1f}ms "
+                  f"p99={summary[f'{kind}_p99_ms']:7.1f}ms")
+    if summary["viewers"]:
+        print(f"  broadcast     p50={summary['lag_p50_ms']:7.1f}ms p95={summary['lag_p95_ms']:7.1f}ms "
+              f"p99={summary['lag_p99_ms']:7.1f}ms; delivered {summary['delivered']}/{summary['expected_deliveries']}, "
+              f"{summary['leaderboard_frames']} leaderboard frames")
+    print(f"  server memory peak {summary['peak_rss_mb']:.1f} MB")
+
+
+def compare(summary, baseline, tolerance):
+    ok = True
+    print(f"\nagainst baseline (tolerance {tolerance:.0%}):")
+    for key, higher_is_better in COMPARED:
+        old, new = baseline.get(key), summary.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "REGRESSION" if worse > tolerance else "ok"
+        ok = ok and worse <= tolerance
+        print(f"  {key:<15} {old:>10} -> {new:<10} ({change:+.0%}) {flag}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scenario", choices=sorted(SCENARIOS), default="smoke")
+    ap.add_argument("--url", help="target a running server instead of starting app.py")
+    ap.add_argument("--password", default="", help="ADMIN_PASSWORD of the server (for /metrics)")
+    ap.add_argument("--judges", type=int)
+    ap.add_argument("--viewers", type=int)
+    ap.add_argument("--admins", type=int)
+    ap.add_argument("--scores", type=int)
+    ap.add_argument("--rate", type=float, help="scores per second per judge (0 = as fast as possible)")
+    ap.add_argument("--admin-every", type=float, default=2.0)
+    ap.add_argument("--report-every", type=float, default=2.0)
+    ap.add_argument("--save", help="write the JSON summary here")
+    ap.add_argument("--baseline", help="compare with a summary written by --save")
+    ap.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against --baseline")
+    args = ap.parse_args()
+    for key, value in SCENARIOS[args.scenario].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+
+    proc = None
+    url = args.url
+    if not url:
+        data_dir = tempfile.mkdtemp()
+        env = {"DATA_DIR": data_dir, "DATA_PATH": os.path.join(data_dir, "data.json"), "ADMIN_PASSWORD": args.password}
+        proc, url = start_server(free_port(), env)
+    client = Client(url, args.password)
+    rec = Recorder()
+    stop = threading.Event()
+    viewers = []
+    try:
+        pids = [p["id"] for p in client.request("/api/state?scores=0")["participants"]]
+        viewers = connect_viewers(url, rec, args.viewers) if args.viewers else []
+        samples = []
+        background = [threading.Thread(target=monitor, args=(client, rec, args, stop, samples), daemon=True)]
+        background += [threading.Thread(target=admin, args=(client, rec, args, stop), daemon=True) for _ in range(args.admins)]
+        for t in background:
+            t.start()
+
+        started = time.time()
+        judges(client, rec, pids, args, stop)
+        elapsed = time.time() - started
+        # Let the last ticks reach the viewers before counting deliveries.
+        deadline = time.time() + 30
+        while args.viewers and sum(rec.delivered.values()) < len(rec.accepted) * args.viewers and time.time() < deadline:
+            time.sleep(0.2)
+        stop.set()
+        for t in background:
+            t.join()
+        samples.append({"t": round(time.time() - started, 1), "accepted": len(rec.accepted), "rss_mb": server_rss(client)})
+
+        stored = {s["id"] for s in client.request("/api/state")["scores"]}
+        missing = rec.accepted - stored
+        summary = summarize(rec, args, elapsed, samples)
+        summary["missing"] = len(missing)
+        report(summary)
+        ok = not missing and summary["delivered"] == summary["expected_deliveries"]
+        if missing:
+            print(f"  {len(missing)} accepted scores are not stored")
+        if summary["delivered"] != summary["expected_deliveries"]:
+            print(f"  some live updates never arrived ({summary['viewer_disconnects']} viewers were disconnected)")
+        if args.save:
+            with open(args.save, "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2)
+        if args.baseline:
+            with open(args.baseline, encoding="utf-8") as f:
+                ok = compare(summary, json.load(f), args.tolerance) and ok
+    finally:
+        stop.set()
+        for v in viewers:
+            v.disconnect()
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
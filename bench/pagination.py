@@ -0,0 +1,65 @@
+"""Page-fetch latency at increasing depth, and database size before/after retention.
+
+Fills a scratch database with --scores scores and --events events, times
+fetching a page near the start, middle and end of the score list with
+keyset pagination (db.page_scores) against LIMIT/OFFSET, then ages every
+event past the retention cutoff and reports what db.run_retention() frees.
+
+    python bench/pagination.py --scores 100000 --events 200000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def timed(fn, repeat=20):
+    t = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t) / repeat * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scores", type=int, default=100000)
+    ap.add_argument("--events", type=int, default=200000)
+    ap.add_argument("--page", type=int, default=50)
+    args = ap.parse_args()
+
+    os.environ["DATA_DIR"] = tempfile.mkdtemp()
+    import db
+
+    db.init_db()
+    with db.connect() as conn:
+        pids = [db.upsert_participant(conn, f"P{i}")["id"] for i in range(20)]
+        for i in range(args.scores):
+            db.insert_score(conn, pids[i % len(pids)], f"judge-{i}", {"taste": 5, "presentation": 6, "spirit": 7})
+        conn.executemany(
+            "INSERT INTO events (event_type, payload_json, created_at) VALUES ('score_added', ?, ?)",
+            (('{"score_id": %d}' % i, "2000-01-01T00:00:00+00:00") for i in range(args.events)),
+        )
+
+    with db.read() as conn:
+        print(f"{'depth':>8} {'keyset ms':>10} {'offset ms':>10}")
+        for depth in (0, args.scores // 2, args.scores - args.page):
+            before = args.scores - depth + 1  # ids are 1..N, newest first
+            keyset = timed(lambda: db.page_scores(conn, before=before, limit=args.page))
+            offset = timed(lambda: conn.execute(
+                "SELECT * FROM scores ORDER BY id DESC LIMIT ? OFFSET ?", (args.page, depth)
+            ).fetchall())
+            print(f"{depth:>8} {keyset:>10.3f} {offset:>10.3f}")
+
+    t = time.perf_counter()
+    report = db.run_retention(older_than_days=1)
+    print(
+        f"retention: archived {report['archived']} events into {len(report['files'])} files in "
+        f"{time.perf_counter() - t:.2f}s; {report['bytes_before'] / 1e6:.1f} MB -> {report['bytes_after'] / 1e6:.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    main()
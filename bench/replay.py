@@ -0,0 +1,82 @@
+"""Point-in-time leaderboard and summary-rebuild cost, with and without snapshots.
+
+Submits --scores scores through the Store (so every write records its
+event and snapshots are taken every --every events), then times
+replay.leaderboard_at() at random points, the lead-changes feed, and
+rebuilding the summary tables from the latest snapshot versus
+db.rebuild_score_summary's full rescan.
+
+    python bench/replay.py --scores 20000 --every 500
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--scores", type=int, default=20000)
+    ap.add_argument("--every", type=int, default=500)
+    ap.add_argument("--queries", type=int, default=50)
+    args = ap.parse_args()
+
+    os.environ["DATA_DIR"] = tempfile.mkdtemp()
+    os.environ["SNAPSHOT_EVERY"] = str(args.every)
+    import db
+    import replay
+    from store import Store
+
+    store = Store()
+    pids = sorted(store.participant_ids())
+    for i in range(args.scores):
+        store.add_score({
+            "participantId": pids[i % len(pids)], "judge": f"judge-{i}",
+            "taste": random.randint(1, 10), "presentation": random.randint(1, 10), "spirit": random.randint(1, 10),
+        })
+
+    with db.read() as conn:
+        head = replay.resolve_event_id(conn, None)
+        first = conn.execute("SELECT MIN(event_id) FROM leaderboard_snapshots").fetchone()[0]
+        snapshots = conn.execute("SELECT COUNT(*) FROM leaderboard_snapshots").fetchone()[0]
+        points = [random.randint(first, head) for _ in range(args.queries)]
+
+        t = time.perf_counter()
+        for at in points:
+            replay.leaderboard_at(conn, at)
+        with_snapshots = (time.perf_counter() - t) / len(points) * 1000
+
+        # The same queries replayed from the first snapshot only, i.e. a full event scan.
+        t = time.perf_counter()
+        for at in points:
+            state = replay._start(conn, first)
+            for event in replay._events(conn, state.event_id, at):
+                state.apply(conn, event)
+            state.leaderboard()
+        from_start = (time.perf_counter() - t) / len(points) * 1000
+
+        t = time.perf_counter()
+        feed = replay.lead_changes(conn)
+        feed_ms = (time.perf_counter() - t) * 1000
+
+    with db.connect() as conn:
+        t = time.perf_counter()
+        replay.rebuild_summary(conn)
+        from_snapshot = (time.perf_counter() - t) * 1000
+        t = time.perf_counter()
+        db.rebuild_score_summary(conn)
+        rescan = (time.perf_counter() - t) * 1000
+
+    print(f"{args.scores} scores, {head} events, {snapshots} snapshots")
+    print(f"leaderboard_at: {with_snapshots:.2f} ms with snapshots, {from_start:.2f} ms replaying from the start")
+    print(f"lead changes over the whole history: {len(feed['changes'])} in {feed_ms:.0f} ms")
+    print(f"summary rebuild: {from_snapshot:.2f} ms from snapshot, {rescan:.2f} ms full rescan")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Measure score throughput and live-update fan-out as gunicorn workers are added.
+
+For each worker count, starts `gunicorn -k eventlet -w N app:app` on a
+scratch DATA_DIR with a shared message queue, connects --viewers Socket.IO
+clients (spread across the workers by the kernel), posts --scores scores
+from --threads threads and reports requests/s, how many scores reached the
+viewers through the "activity" room, and the submit-to-delivery lag.
+
+    pip install "python-socketio[client]"
+    python bench/scale_workers.py --workers 1 2 4 --viewers 100 --scores 2000
+    python bench/scale_workers.py --queue redis://localhost:6379/0
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(workers, port, env):
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-k", "eventlet", "-w", str(workers), "-b", f"127.0.0.1:{port}", "app:app"],
+        cwd=ROOT,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            urllib.request.urlopen(url + "/api/leaderboard", timeout=1).read()
+            return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("gunicorn did not start")
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=30) as r:
+        return json.loads(r.read())
+
+
+def post_json(url, payload):
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=30) as r:
+        return json.loads(r.read())
+
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def connect_viewers(url, n, lags):
+    import socketio  # python-socketio[client]
+
+    lock = threading.Lock()
+    clients = []
+    for _ in range(n):
+        sio = socketio.Client(reconnection=False)
+
+        @sio.on("scores")
+        def on_scores(msg):
+            now = time.time()
+            with lock:
+                lags.extend(now - float(s["comments"] or 0) for s in msg["scores"])
+
+        sio.connect(url, transports=["websocket"])
+        sio.call("subscribe", {"rooms": ["activity"]})
+        clients.append(sio)
+    return clients
+
+
+def run(workers, queue, args):
+    data_dir = tempfile.mkdtemp()
+    env = {"DATA_DIR": data_dir, "DATA_PATH": os.path.join(data_dir, "data.json")}
+    if queue:
+        env["SOCKETIO_MESSAGE_QUEUE"] = queue
+    proc, url = start_gunicorn(workers, free_port(), env)
+    lags = []
+    clients = []
+    try:
+        clients = connect_viewers(url, args.viewers, lags)
+        pids = [p["id"] for p in get_json(url + "/api/state")["participants"]]
+
+        def submit(i):
+            t = time.time()
+            post_json(url + "/api/score", {
+                "participantId": pids[i % len(pids)],
+                "judge": f"bench-{i}",
+                "taste": 1 + i % 10, "presentation": 5, "spirit": 7,
+                "comments": repr(t),  # viewers read the send time back out of the live update
+            })
+            return time.time() - t
+
+        started = time.time()
+        with ThreadPoolExecutor(args.threads) as ex:
+            latencies = list(ex.map(submit, range(args.scores)))
+        elapsed = time.time() - started
+
+        expected = args.scores * args.viewers
+        deadline = time.time() + 30
+        while len(lags) < expected and time.time() < deadline:
+            time.sleep(0.1)
+        delivered_in = time.time() - started
+        stored = len(get_json(url + "/api/state")["scores"])
+        print(
+            f"workers={workers:<2} scores/s={args.scores / elapsed:7.1f} "
+            f"post p50={pct(latencies, 50) * 1000:6.1f}ms p95={pct(latencies, 95) * 1000:6.1f}ms | "
+            f"delivered {len(lags)}/{expected} ({len(lags) / delivered_in:8.0f}/s) "
+            f"lag p50={pct(lags, 50) * 1000:6.1f}ms p95={pct(lags, 95) * 1000:6.1f}ms | stored={stored}"
+        )
+    finally:
+        for c in clients:
+            c.disconnect()
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--queue", default="sqlite", help="SOCKETIO_MESSAGE_QUEUE for runs with more than one worker")
+    ap.add_argument("--viewers", type=int, default=50)
+    ap.add_argument("--scores", type=int, default=1000)
+    ap.add_argument("--threads", type=int, default=16)
+    args = ap.parse_args()
+    for n in args.workers:
+        run(n, args.queue if n > 1 else "", args)
+
+
+if __name__ == "__main__":
+    main()
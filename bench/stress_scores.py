@@ -0,0 +1,129 @@
+"""Fire concurrent score submissions at the app and check none were lost.
+
+Starts app.py on a scratch DATA_DIR (or targets --url), has --judges
+threads each post --per-judge scores, then verifies every accepted id is
+present in /api/state, both live and after a server restart.
+
+    python bench/stress_scores.py --judges 40 --per-judge 25
+    python bench/stress_scores.py --judges 40 --per-judge 25 --group-commit-ms 10
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "app.py")],
+        cwd=ROOT,
+        env={**os.environ, **env, "PORT": str(port)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url + "/api/leaderboard", timeout=1).read()
+            return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit("server did not start")
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=10) as r:
+        return json.loads(r.read())
+
+
+def post_json(url, payload):
+    req = urllib.request.Request(
+        url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=10) as r:
+        return json.loads(r.read())
+
+
+def check(url, accepted):
+    ids = {s["id"] for s in get_json(url + "/api/state")["scores"]}
+    missing = accepted - ids
+    print(f"  stored={len(ids)} accepted={len(accepted)} missing={len(missing)}")
+    return not missing
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", help="target a running server instead of starting one")
+    ap.add_argument("--judges", type=int, default=40)
+    ap.add_argument("--per-judge", type=int, default=25)
+    ap.add_argument("--group-commit-ms", type=float, default=0, help="GROUP_COMMIT_WINDOW_MS for the started server")
+    args = ap.parse_args()
+
+    proc = None
+    data_dir = tempfile.mkdtemp()
+    env = {
+        "DATA_DIR": data_dir,
+        "DATA_PATH": os.path.join(data_dir, "data.json"),
+        "GROUP_COMMIT_WINDOW_MS": str(args.group_commit_ms),
+    }
+    url = args.url
+    if not url:
+        port = free_port()
+        proc, url = start_server(port, env)
+
+    participants = [p["id"] for p in get_json(url + "/api/state")["participants"]]
+
+    def judge(j):
+        ids = []
+        for i in range(args.per_judge):
+            # one judge name per submission so the one-score-per-judge rule never rejects
+            res = post_json(url + "/api/score", {
+                "judge": f"judge-{j}-{i}",
+                "participantId": participants[(j + i) % len(participants)],
+                "taste": 1 + (i % 10), "presentation": 5, "spirit": 7,
+            })
+            if res.get("success"):
+                ids.append(res["id"])
+        return ids
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.judges) as pool:
+        accepted = [i for ids in pool.map(judge, range(args.judges)) for i in ids]
+    elapsed = time.perf_counter() - t0
+
+    total = args.judges * args.per_judge
+    print(f"{len(accepted)}/{total} accepted in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    ok = len(accepted) == total and len(set(accepted)) == len(accepted)
+    print("live:")
+    ok = check(url, set(accepted)) and ok
+
+    if proc is not None:
+        proc.terminate()
+        proc.wait()
+        proc, url = start_server(port, env)
+        print("after restart:")
+        ok = check(url, set(accepted)) and ok
+        proc.terminate()
+        proc.wait()
+
+    print("OK" if ok else "LOST OR DUPLICATE SCORES")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
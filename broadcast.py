@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import threading
+
+import metrics
+
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "5"))  # max live-update ticks per second (0 = emit every change at once)
+
+# Rooms a client can join with the "subscribe" socket event:
+#   leaderboard        - the full ranking, at most once per tick
+#   activity           - newly added scores, batched per tick
+#   participant:<id>   - newly added scores for one participant
+#   admin              - one-line summaries of every change (admin password required if set)
+# The roster ("participants") and "reset" go to every client of the competition.
+# Rooms are per competition: "leaderboard" of competition "office" is the Socket.IO room
+# "office:leaderboard", and every client of "office" is in "office:*" (see room_name).
+PUBLIC_ROOMS = ("leaderboard", "activity")
+ADMIN_ROOM = "admin"
+ALL_ROOM = "*"
+
+
+def room_name(competition, room) -> str:
+    return f"{competition}:{room}"
+
+
+def valid_room(room) -> bool:
+    if room in PUBLIC_ROOMS or room == ADMIN_ROOM:
+        return True
+    prefix, _, pid = str(room).partition(":")
+    return prefix == "participant" and pid.isdigit()
+
+
+def _feed_line(event, payload):
+    if event == "score_added":
+        s = payload["score"]
+        return {"seq": payload["seq"], "kind": event, "text": f'{s["judge"]} scored #{s["participantId"]}: {s["total"]}'}
+    if event == "participant_changed":
+        return {"seq": payload["seq"], "kind": event, "text": f'Roster updated ({len(payload["participants"])} active)'}
+    if event == "reset":
+        return {"seq": payload["seq"], "kind": event, "text": "Data replaced by an import"}
+    return None
+
+
+class Broadcaster:
+    """Turns store changes into per-room Socket.IO emits, coalesced into ticks.
+
+    Changes are collected as the store publishes them and flushed at most
+    once per 1/rate seconds: twenty scores in a second become a handful of
+    leaderboard frames rather than twenty, and each room only gets the part
+    of the tick it subscribed to. Every payload is a complete value (the
+    whole ranking, the whole roster) or an id-keyed addition (scores), so a
+    client that misses a tick is corrected by the next one.
+    """
+
+    def __init__(self, socketio, store, rate=BROADCAST_RATE):
+        self.socketio = socketio
+        self.store = store
+        self.competition = store.competition
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._last_flush = 0.0
+        self._clear()
+
+    def _clear(self):
+        self._scores = []
+        self._feed = []
+        self._participants = None
+        self._leaderboard = False
+        self._reset = False
+
+    # store listener
+    def __call__(self, event, payload):
+        with self._lock:
+            if event == "score_added":
+                self._scores.append(payload["score"])
+            elif event == "participant_changed":
+                self._participants = payload
+            elif event == "leaderboard_delta":
+                self._leaderboard = True
+            elif event == "reset":
+                self._clear()
+                self._reset = True
+            line = _feed_line(event, payload)
+            if line:
+                self._feed.append(line)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        if self.interval:
+            delay = max(0.0, self._last_flush + self.interval - time.time())
+            self.socketio.start_background_task(self._flush_after, delay)
+        else:
+            self.flush()
+
+    def _flush_after(self, delay):
+        # Even with no delay this runs after the current commit has finished notifying,
+        # so the changes of one request always go out together.
+        self.socketio.sleep(delay)
+        self.flush()
+
+    def _recipients(self, room):
+        # Clients connected to this worker that an emit to `room` reaches.
+        return sum(1 for _ in self.socketio.server.manager.get_participants("/", room))
+
+    def _emit(self, event, data, to=ALL_ROOM):
+        to = room_name(self.competition, to)
+        started = time.perf_counter()
+        self.socketio.emit(event, data, to=to)
+        metrics.EMIT_SECONDS.observe(time.perf_counter() - started, event)
+        if metrics.METRICS_ENABLED:
+            recipients = self._recipients(to)
+            metrics.EMITS.inc(event)
+            metrics.EMIT_RECIPIENTS.inc(event, amount=recipients)
+            # Socket.IO encodes the payload once per emit; this second encoding is only for counting.
+            metrics.EMIT_BYTES.inc(event, amount=len(json.dumps(data, separators=(",", ":"))) * recipients)
+
+    def flush(self):
+        with self._lock:
+            scores, feed, participants = self._scores, self._feed, self._participants
+            leaderboard, reset = self._leaderboard, self._reset
+            self._clear()
+            self._scheduled = False
+            self._last_flush = time.time()
+        seq = self.store.seq
+        emit = self._emit
+        if reset:
+            emit("reset", {"seq": seq})  # clients refetch everything; nothing else in this tick matters
+        else:
+            if participants:
+                emit("participants", participants)
+            if leaderboard:
+                emit("leaderboard", {"seq": seq, "rows": self.store.leaderboard()}, to="leaderboard")
+            if scores:
+                emit("scores", {"seq": seq, "scores": scores}, to="activity")
+                by_participant = {}
+                for s in scores:
+                    by_participant.setdefault(s["participantId"], []).append(s)
+                for pid, batch in by_participant.items():
+                    emit("scores", {"seq": seq, "scores": batch}, to=f"participant:{pid}")
+        if feed:
+            emit("feed", {"seq": seq, "items": feed}, to=ADMIN_ROOM)
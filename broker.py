@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import sqlite3
+
+import socketio
+
+import db
+
+MQ_POLL_INTERVAL = float(os.getenv("MQ_POLL_INTERVAL", "0.01"))  # seconds between checks for other workers' emits
+MQ_RETENTION = float(os.getenv("MQ_RETENTION", "60"))  # seconds a delivered message is kept before pruning
+
+
+def queue_path(url: str) -> str:
+    # sqlite:///abs/path.sqlite3, sqlite://relative.sqlite3, or plain "sqlite" for ${DATA_DIR}/socketio-queue.sqlite3
+    path = url.split("://", 1)[1] if "://" in url else ""
+    if path.startswith("/") and not path.startswith("//"):
+        return path
+    path = path.lstrip("/")
+    if not path:
+        os.makedirs(db.get_data_dir(), exist_ok=True)
+        return os.path.join(db.get_data_dir(), "socketio-queue.sqlite3")
+    return path
+
+
+class SQLiteManager(socketio.PubSubManager):
+    """Socket.IO message queue stored in a SQLite file shared by every worker.
+
+    A stand-in for Redis when all workers run on one machine (or in tests):
+    each emit is appended to a table, and every worker polls for rows written
+    by the others and delivers them to its own clients. The queue lives in
+    its own database file so its writes never contend with score commits.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, url="sqlite://", channel="flask-socketio", write_only=False, logger=None, json=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.path = queue_path(url)
+        self._conn = None
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use so each forked worker gets its own connection.
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+            conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS messages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    host_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                '''
+            )
+            self._conn = conn
+        return self._conn
+
+    def _publish(self, data):
+        self._db().execute(
+            "INSERT INTO messages (channel, host_id, payload, created_at) VALUES (?,?,?,?)",
+            (self.channel, self.host_id, json.dumps(data, separators=(",", ":")), time.time()),
+        )
+
+    def _listen(self):
+        conn = self._db()
+        last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+        pruned = time.time()
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload FROM messages WHERE id > ? AND channel = ? AND host_id != ? ORDER BY id",
+                (last, self.channel, self.host_id),
+            ).fetchall()
+            for message_id, payload in rows:
+                last = message_id
+                yield payload
+            now = time.time()
+            if now - pruned > MQ_RETENTION:
+                conn.execute("DELETE FROM messages WHERE created_at < ?", (now - MQ_RETENTION,))
+                pruned = now
+            time.sleep(MQ_POLL_INTERVAL)
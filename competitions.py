@@ -0,0 +1,67 @@
+import threading
+
+import db
+from store import Store
+from broadcast import Broadcaster
+
+
+class Competitions:
+    """One Store (with its Broadcaster) per competition, opened the first time it is used.
+
+    Every competition is a separate SQLite file (db.db_path) with its own
+    write lock, so a busy bakeoff never holds up another one. The Stores
+    stay loaded; their database connections are what db.pools bounds.
+    """
+
+    def __init__(self, socketio, shared=False, legacy_path=None):
+        self.socketio = socketio
+        self.shared = shared
+        self.legacy_path = legacy_path  # only ever imported into the default competition
+        self._stores = {}
+        self._lock = threading.Lock()
+
+    def get(self, competition=None) -> Store:
+        """The competition's Store. Raises KeyError if it doesn't exist."""
+        competition = competition or db.DEFAULT_COMPETITION
+        store = self._stores.get(competition)
+        if store is not None:
+            return store
+        if not db.competition_exists(competition):
+            raise KeyError(competition)
+        return self._open(competition)
+
+    def _open(self, competition):
+        with self._lock:
+            store = self._stores.get(competition)
+            if store is None:
+                legacy = self.legacy_path if competition == db.DEFAULT_COMPETITION else None
+                store = Store(legacy_path=legacy, shared=self.shared, competition=competition)
+                store.subscribe(Broadcaster(self.socketio, store))  # coalesced, per-room live updates
+                self._stores[competition] = store
+            return store
+
+    def create(self, competition, name) -> Store:
+        if not db.valid_competition(competition):
+            raise ValueError("Competition ids are 1-40 lowercase letters, digits or dashes")
+        if db.competition_exists(competition):
+            raise ValueError(f"Competition {competition} already exists")
+        name = (name or "").strip() or competition
+        db.init_db(competition)
+        with db.connect(competition) as conn:
+            db.set_setting(conn, "competition_name", name)
+        return self._open(competition)
+
+    def list(self) -> list:
+        out = []
+        for competition in db.list_competition_ids():
+            with db.read(competition) as conn:
+                name = db.get_settings(conn).get("competition_name") or competition
+            out.append({"id": competition, "name": name})
+        return out
+
+    def loaded(self) -> list:
+        return list(self._stores.values())
+
+    def close(self):
+        for store in self.loaded():
+            store.close()
@@ -1,16 +1,46 @@
 import os
+import re
 import json
+import queue
 import sqlite3
-from contextlib import contextmanager
-from datetime import datetime, timezone
+import threading
+import gzip
+import itertools
+import time
+import zlib
+import tempfile
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta, timezone
+
+import metrics
 
 DEFAULT_CRITERIA = [
     {"key": "taste", "label": "Taste", "max": 10, "weight": 1.0},
     {"key": "presentation", "label": "Presentation", "max": 10, "weight": 1.0},
-    {"key": "creativity", "label": "Creativity", "max": 10, "weight": 1.0},
-    {"key": "holiday_spirit", "label": "Holiday Spirit", "max": 10, "weight": 1.0},
+    {"key": "spirit", "label": "Christmas Spirit", "max": 10, "weight": 1.0},
 ]
 
+DB_READERS = int(os.getenv("DB_READERS", "4"))  # pooled read-only connections per database
+DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT", "30"))
+# The writer's fsync policy. NORMAL (WAL's usual setting) can lose the last commits on power loss;
+# with group commit on (store.py) commits are batched, so each batch can afford a full fsync.
+DB_SYNCHRONOUS = os.getenv("DB_SYNCHRONOUS", "").upper() or (
+    "FULL" if float(os.getenv("GROUP_COMMIT_WINDOW_MS", "0")) > 0 else "NORMAL"
+)
+if DB_SYNCHRONOUS not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+    raise ValueError(f"DB_SYNCHRONOUS must be OFF, NORMAL, FULL or EXTRA, not {DB_SYNCHRONOUS!r}")
+PAGE_SIZE_MAX = 200  # rows per page for the keyset-paginated list endpoints
+EVENT_RETENTION_DAYS = float(os.getenv("EVENT_RETENTION_DAYS", "30"))  # older events move to ${DATA_DIR}/archive (0 = keep all)
+ARCHIVE_BATCH_SIZE = 5000  # events per archive file (and per write transaction)
+DB_MAX_OPEN = int(os.getenv("DB_MAX_OPEN", "8"))  # competition databases kept open at once (least recently used close first)
+
+# Each competition is its own SQLite file: "default" is ${DATA_DIR}/bakeoff.sqlite3 (the original
+# single database), any other id is ${DATA_DIR}/competitions/<id>.sqlite3.
+DEFAULT_COMPETITION = "default"
+COMPETITION_ID = re.compile(r"^[a-z0-9][a-z0-9-]{0,39}$")
+
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -18,26 +48,256 @@ def get_data_dir() -> str:
     # Render disk: set DATA_DIR=/var/data (or any mounted path)
     return os.getenv("DATA_DIR", os.path.join(os.getcwd(), "data"))
 
-def db_path() -> str:
-    os.makedirs(get_data_dir(), exist_ok=True)
-    return os.path.join(get_data_dir(), "bakeoff.sqlite3")
+def valid_competition(competition) -> bool:
+    return bool(COMPETITION_ID.match(str(competition or "")))
 
-@contextmanager
-def connect():
-    path = db_path()
-    conn = sqlite3.connect(path, check_same_thread=False)
+
+def competitions_dir() -> str:
+    path = os.path.join(get_data_dir(), "competitions")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def db_path(competition: str = None) -> str:
+    competition = competition or DEFAULT_COMPETITION
+    if competition == DEFAULT_COMPETITION:
+        os.makedirs(get_data_dir(), exist_ok=True)
+        return os.path.join(get_data_dir(), "bakeoff.sqlite3")
+    if not valid_competition(competition):
+        raise ValueError(f"Invalid competition id: {competition!r}")
+    return os.path.join(competitions_dir(), f"{competition}.sqlite3")
+
+
+def competition_exists(competition: str) -> bool:
+    return (competition or DEFAULT_COMPETITION) == DEFAULT_COMPETITION or (
+        valid_competition(competition) and os.path.exists(db_path(competition))
+    )
+
+
+def list_competition_ids() -> list:
+    names = sorted(f[: -len(".sqlite3")] for f in os.listdir(competitions_dir()) if f.endswith(".sqlite3"))
+    return [DEFAULT_COMPETITION] + [n for n in names if valid_competition(n) and n != DEFAULT_COMPETITION]
+
+_STATEMENT_KINDS = {}
+
+
+def _statement_kind(sql):
+    kind = _STATEMENT_KINDS.get(sql)
+    if kind is None:
+        words = sql.split(None, 1)
+        kind = _STATEMENT_KINDS[sql] = words[0].upper() if words else "?"
+    return kind
+
+
+class TimedConnection(sqlite3.Connection):
+    """Records how long each execute()/executemany() takes in metrics.DB_QUERY_SECONDS.
+
+    Covers preparing and running the statement up to its first row; rows
+    fetched later from the cursor are not included.
+    """
+
+    def execute(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, *args)
+        finally:
+            metrics.DB_QUERY_SECONDS.observe(time.perf_counter() - started, _statement_kind(sql))
+
+    def executemany(self, sql, *args):
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, *args)
+        finally:
+            metrics.DB_QUERY_SECONDS.observe(time.perf_counter() - started, _statement_kind(sql))
+
+
+def _open(path: str, readonly: bool = False) -> sqlite3.Connection:
+    # timeout: how long to wait on another process's write lock (multi-worker deployments)
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT,
+        check_same_thread=False,
+        factory=TimedConnection if metrics.METRICS_ENABLED else sqlite3.Connection,
+    )
     conn.row_factory = sqlite3.Row
+    if not readonly:
+        # Only takes effect on a brand-new file; compact() converts older databases.
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
     conn.execute("PRAGMA foreign_keys = ON;")
     conn.execute("PRAGMA journal_mode = WAL;")
-    conn.execute("PRAGMA synchronous = NORMAL;")
-    try:
+    conn.execute(f"PRAGMA synchronous = {'NORMAL' if readonly else DB_SYNCHRONOUS};")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON;")
+    return conn
+
+
+class ConnectionPool:
+    """Long-lived, pre-configured connections for one database file.
+
+    There is a single writer connection guarded by a lock (SQLite only ever
+    allows one writer anyway) and a small set of read-only connections that
+    WAL lets run alongside it. Write transactions start with BEGIN IMMEDIATE,
+    so when several worker processes share the file, anything read inside
+    writer() is already protected from the other workers. The lock and queue come from `threading` and
+    `queue`, so under eventlet's monkey patching they block greenlets rather
+    than the whole process.
+    """
+
+    def __init__(self, path: str, readers: int = DB_READERS):
+        self.path = path
+        self._writer = _open(path)
+        self._write_lock = threading.Lock()
+        self._readers = queue.LifoQueue()
+        for _ in range(max(1, readers)):
+            self._readers.put(_open(path, readonly=True))
+
+    @contextmanager
+    def writer(self):
+        started = time.perf_counter()
+        with self._write_lock:
+            acquired = time.perf_counter()
+            metrics.DB_WAIT_SECONDS.observe(acquired - started, "write")
+            try:
+                self._writer.execute("BEGIN IMMEDIATE")
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+            finally:
+                metrics.DB_HOLD_SECONDS.observe(time.perf_counter() - acquired, "write")
+
+    @contextmanager
+    def maintenance(self):
+        # The writer with no transaction open, for VACUUM and PRAGMAs that refuse to run inside one.
+        with self._write_lock:
+            yield self._writer
+
+    @contextmanager
+    def reader(self):
+        started = time.perf_counter()
+        conn = self._readers.get()
+        acquired = time.perf_counter()
+        metrics.DB_WAIT_SECONDS.observe(acquired - started, "read")
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+            metrics.DB_HOLD_SECONDS.observe(time.perf_counter() - acquired, "read")
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+
+class PoolCache:
+    """The open ConnectionPools, one per database file, least recently used first.
+
+    At most `capacity` stay open: checking out a pool that isn't open opens
+    it and closes the least recently used idle one. A pool that is checked
+    out is never closed, so a busy moment can briefly hold more than
+    `capacity`; the extras are closed as they are returned.
+    """
+
+    def __init__(self, capacity: int = DB_MAX_OPEN):
+        self.capacity = max(1, capacity)
+        self._pools = OrderedDict()
+        self._users = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def checkout(self, path: str):
+        with self._lock:
+            pool = self._pools.pop(path, None)
+            if pool is None:
+                pool = ConnectionPool(path)
+                metrics.DB_POOLS_OPENED.inc()
+            self._pools[path] = pool
+            self._users[path] = self._users.get(path, 0) + 1
+            self._evict()
+        try:
+            yield pool
+        finally:
+            with self._lock:
+                self._users[path] -= 1
+                self._evict()
+
+    def _evict(self):
+        for path in list(self._pools):
+            if len(self._pools) <= self.capacity:
+                return
+            if not self._users.get(path):
+                self._users.pop(path, None)
+                self._pools.pop(path).close()
+                metrics.DB_POOLS_EVICTED.inc()
+
+    def __len__(self):
+        return len(self._pools)
+
+    def close(self, path: str = None) -> None:
+        with self._lock:
+            for p in [path] if path else list(self._pools):
+                pool = self._pools.pop(p, None)
+                if pool is not None:
+                    pool.close()
+
+
+pools = PoolCache()
+
+
+@contextmanager
+def connect(competition: str = None):
+    # Borrow the competition's pooled writer: commits on success, rolls back on error.
+    with pools.checkout(db_path(competition)) as pool, pool.writer() as conn:
         yield conn
-        conn.commit()
-    finally:
-        conn.close()
 
-def init_db():
-    with connect() as conn:
+
+@contextmanager
+def read(competition: str = None):
+    with pools.checkout(db_path(competition)) as pool, pool.reader() as conn:
+        yield conn
+
+
+@contextmanager
+def maintenance(competition: str = None):
+    with pools.checkout(db_path(competition)) as pool, pool.maintenance() as conn:
+        yield conn
+
+# Keep score_counts/score_totals in step with every insert and delete.
+SUMMARY_TRIGGERS = {
+    "trg_scores_count_ins": '''
+        CREATE TRIGGER IF NOT EXISTS trg_scores_count_ins AFTER INSERT ON scores BEGIN
+            INSERT INTO score_counts (participant_id, num_scores) VALUES (NEW.participant_id, 1)
+            ON CONFLICT(participant_id) DO UPDATE SET num_scores = num_scores + 1;
+        END
+    ''',
+    "trg_scores_count_del": '''
+        CREATE TRIGGER IF NOT EXISTS trg_scores_count_del AFTER DELETE ON scores BEGIN
+            UPDATE score_counts SET num_scores = num_scores - 1 WHERE participant_id = OLD.participant_id;
+        END
+    ''',
+    "trg_score_values_ins": '''
+        CREATE TRIGGER IF NOT EXISTS trg_score_values_ins AFTER INSERT ON score_values BEGIN
+            INSERT INTO score_totals (participant_id, criterion_key, total, n)
+            VALUES (NEW.participant_id, NEW.criterion_key, NEW.value, 1)
+            ON CONFLICT(participant_id, criterion_key) DO UPDATE SET total = total + NEW.value, n = n + 1;
+        END
+    ''',
+    "trg_score_values_del": '''
+        CREATE TRIGGER IF NOT EXISTS trg_score_values_del AFTER DELETE ON score_values BEGIN
+            UPDATE score_totals SET total = total - OLD.value, n = n - 1
+            WHERE participant_id = OLD.participant_id AND criterion_key = OLD.criterion_key;
+        END
+    ''',
+}
+
+
+def init_db(competition: str = None):
+    with connect(competition) as conn:
         conn.executescript(
             '''
             CREATE TABLE IF NOT EXISTS participants (
@@ -68,6 +328,33 @@ def init_db():
                 FOREIGN KEY(participant_id) REFERENCES participants(id) ON DELETE CASCADE
             );
 
+            -- One row per criterion of each score (criteria_json is kept for exports).
+            CREATE TABLE IF NOT EXISTS score_values (
+                score_id INTEGER NOT NULL,
+                participant_id INTEGER NOT NULL,
+                criterion_key TEXT NOT NULL,
+                value REAL NOT NULL,
+                PRIMARY KEY(score_id, criterion_key),
+                FOREIGN KEY(score_id) REFERENCES scores(id) ON DELETE CASCADE
+            );
+            CREATE INDEX IF NOT EXISTS idx_score_values_participant
+                ON score_values(participant_id, criterion_key);
+
+            -- Running per-participant sums, kept current by SUMMARY_TRIGGERS.
+            CREATE TABLE IF NOT EXISTS score_counts (
+                participant_id INTEGER PRIMARY KEY,
+                num_scores INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY(participant_id) REFERENCES participants(id) ON DELETE CASCADE
+            );
+            CREATE TABLE IF NOT EXISTS score_totals (
+                participant_id INTEGER NOT NULL,
+                criterion_key TEXT NOT NULL,
+                total REAL NOT NULL DEFAULT 0,
+                n INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY(participant_id, criterion_key),
+                FOREIGN KEY(participant_id) REFERENCES participants(id) ON DELETE CASCADE
+            );
+
             CREATE TABLE IF NOT EXISTS settings (
                 k TEXT PRIMARY KEY,
                 v TEXT NOT NULL
@@ -79,9 +366,20 @@ def init_db():
                 payload_json TEXT NOT NULL,
                 created_at TEXT NOT NULL
             );
+
+            -- Leaderboard state as of an event id; replay.py starts from the nearest one.
+            CREATE TABLE IF NOT EXISTS leaderboard_snapshots (
+                event_id INTEGER PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                state_json TEXT NOT NULL
+            );
             '''
         )
 
+        conn.execute("BEGIN IMMEDIATE")  # executescript committed; workers starting together migrate one at a time
+        for ddl in SUMMARY_TRIGGERS.values():
+            conn.execute(ddl)
+
         if conn.execute("SELECT COUNT(*) AS c FROM settings").fetchone()["c"] == 0:
             set_setting(conn, "competition_name", "2025 Holiday Bakeoff")
             set_setting(conn, "theme", "christmas")
@@ -89,6 +387,88 @@ def init_db():
             set_setting(conn, "voting_open", True)
             set_setting(conn, "allow_multiple_scores_per_judge", False)
 
+        migrate(conn)
+
+
+def rebuild_score_summary(conn: sqlite3.Connection) -> None:
+    """Recompute score_counts/score_totals from scratch (the triggers keep them current after)."""
+    conn.execute("DELETE FROM score_counts")
+    conn.execute("DELETE FROM score_totals")
+    conn.execute(
+        "INSERT INTO score_counts (participant_id, num_scores) "
+        "SELECT participant_id, COUNT(*) FROM scores GROUP BY participant_id"
+    )
+    conn.execute(
+        "INSERT INTO score_totals (participant_id, criterion_key, total, n) "
+        "SELECT participant_id, criterion_key, SUM(value), COUNT(*) FROM score_values GROUP BY participant_id, criterion_key"
+    )
+
+
+def _m001_score_values(conn: sqlite3.Connection) -> None:
+    # Split existing criteria_json blobs into score_values rows.
+    conn.execute(
+        '''
+        INSERT OR IGNORE INTO score_values (score_id, participant_id, criterion_key, value)
+        SELECT s.id, s.participant_id, j.key, CAST(j.value AS REAL)
+        FROM scores s, json_each(s.criteria_json) j
+        WHERE j.type IN ('integer', 'real', 'text')
+        '''
+    )
+    rebuild_score_summary(conn)
+
+
+def _m002_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute("ALTER TABLE scores ADD COLUMN first_for_judge INTEGER")
+    conn.execute(
+        "UPDATE scores SET first_for_judge=1 WHERE id IN "
+        "(SELECT MIN(id) FROM scores GROUP BY participant_id, judge_name)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_participant_judge ON scores(participant_id, judge_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_created_at ON scores(created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type_id ON events(event_type, id)")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_scores_first_for_judge "
+        "ON scores(participant_id, judge_name) WHERE first_for_judge = 1"
+    )
+
+
+def _m003_paging_indexes(conn: sqlite3.Connection) -> None:
+    # (participant_id, id) lets one participant's scores be paged newest-first;
+    # created_at lets retention find old events without scanning the table.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scores_participant_id ON scores(participant_id, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_events_created_at ON events(created_at)")
+
+
+def _m004_snapshots(conn: sqlite3.Connection) -> None:
+    # The first snapshot is taken by the Store on startup (see replay.take_snapshot).
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS leaderboard_snapshots "
+        "(event_id INTEGER PRIMARY KEY, created_at TEXT NOT NULL, state_json TEXT NOT NULL)"
+    )
+
+
+def _m005_score_client_ids(conn: sqlite3.Connection) -> None:
+    # Client-generated ids make score submission idempotent: a retried request finds its first copy.
+    conn.execute("ALTER TABLE scores ADD COLUMN client_id TEXT")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_scores_client_id ON scores(client_id) WHERE client_id IS NOT NULL")
+
+
+# Applied in order; PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    _m001_score_values,
+    _m002_indexes,
+    _m003_paging_indexes,
+    _m004_snapshots,
+    _m005_score_client_ids,
+]
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for i, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        step(conn)
+        conn.execute(f"PRAGMA user_version = {i}")
+
 
 def _coerce_bool(v: str) -> bool:
     return v.lower().strip() in ("1", "true", "yes", "y", "on")
@@ -111,6 +491,11 @@ def get_settings(conn: sqlite3.Connection) -> dict:
     return out
 
 
+def get_change_seq(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT v FROM settings WHERE k='change_seq'").fetchone()
+    return int(row["v"]) if row else 0
+
+
 def set_setting(conn: sqlite3.Connection, k: str, v) -> None:
     if isinstance(v, (dict, list)):
         v = json.dumps(v)
@@ -131,22 +516,34 @@ def add_event(conn: sqlite3.Connection, event_type: str, payload: dict) -> None:
     )
 
 
+def _event_record(r) -> dict:
+    return {
+        "id": r["id"],
+        "type": r["event_type"],
+        "payload": json.loads(r["payload_json"]),
+        "created_at": r["created_at"],
+    }
+
+
 def list_events(conn: sqlite3.Connection, limit: int = 50) -> list:
     rows = conn.execute(
         "SELECT id, event_type, payload_json, created_at FROM events ORDER BY id DESC LIMIT ?",
         (limit,),
     ).fetchall()
-    out = []
-    for r in rows:
-        out.append(
-            {
-                "id": r["id"],
-                "type": r["event_type"],
-                "payload": json.loads(r["payload_json"]),
-                "created_at": r["created_at"],
-            }
-        )
-    return out
+    return [_event_record(r) for r in rows]
+
+
+def page_events(conn: sqlite3.Connection, before: int = None, limit: int = 50, event_type: str = None) -> tuple:
+    """Newest-first events with id < before, and the cursor for the next page (None at the end)."""
+    limit = max(1, min(PAGE_SIZE_MAX, limit))
+    sql = "SELECT id, event_type, payload_json, created_at FROM events WHERE id < ?"
+    params = [before if before is not None else 1 << 62]
+    if event_type:
+        sql += " AND event_type = ?"  # served by idx_events_type_id
+        params.append(event_type)
+    rows = conn.execute(sql + " ORDER BY id DESC LIMIT ?", (*params, limit + 1)).fetchall()
+    items = [_event_record(r) for r in rows[:limit]]
+    return items, (items[-1]["id"] if len(rows) > limit else None)
 
 def list_participants(conn: sqlite3.Connection, include_inactive: bool = True) -> list:
     if include_inactive:
@@ -166,11 +563,12 @@ def upsert_participant(conn: sqlite3.Connection, name: str, active: bool = True)
             "INSERT INTO participants (name, active, created_at) VALUES (?,?,?)",
             (name, 1 if active else 0, now),
         )
-        add_event(conn, "participant_added", {"name": name})
+        row = conn.execute("SELECT * FROM participants WHERE name=?", (name,)).fetchone()
+        add_event(conn, "participant_added", {"id": row["id"], "name": name})
     except sqlite3.IntegrityError:
         conn.execute("UPDATE participants SET active=? WHERE name=?", (1 if active else 0, name))
-        add_event(conn, "participant_updated", {"name": name, "active": active})
-    row = conn.execute("SELECT * FROM participants WHERE name=?", (name,)).fetchone()
+        row = conn.execute("SELECT * FROM participants WHERE name=?", (name,)).fetchone()
+        add_event(conn, "participant_updated", {"id": row["id"], "name": name, "active": active})
     return dict(row)
 
 
@@ -180,6 +578,17 @@ def set_participant_active(conn: sqlite3.Connection, participant_id: int, active
     add_event(conn, "participant_updated", {"id": participant_id, "name": row["name"] if row else None, "active": active})
 
 
+def rename_participant(conn: sqlite3.Connection, participant_id: int, name: str) -> None:
+    name = (name or "").strip()
+    if not name:
+        raise ValueError("Participant name required.")
+    try:
+        conn.execute("UPDATE participants SET name=? WHERE id=?", (name, participant_id))
+    except sqlite3.IntegrityError:
+        raise ValueError(f"Another participant is already named {name}.")
+    add_event(conn, "participant_updated", {"id": participant_id, "name": name})
+
+
 def delete_participant(conn: sqlite3.Connection, participant_id: int) -> None:
     row = conn.execute("SELECT name FROM participants WHERE id=?", (participant_id,)).fetchone()
     conn.execute("DELETE FROM participants WHERE id=?", (participant_id,))
@@ -217,14 +626,21 @@ def upsert_dessert(conn: sqlite3.Connection, participant_id: int, dessert_name:
     )
     add_event(conn, "dessert_upserted", {"participant_id": participant_id, "dessert_name": dessert_name})
 
-def list_scores(conn: sqlite3.Connection) -> list:
+
+def delete_dessert(conn: sqlite3.Connection, participant_id: int) -> None:
+    conn.execute("DELETE FROM desserts WHERE participant_id=?", (participant_id,))
+    add_event(conn, "dessert_deleted", {"participant_id": participant_id})
+
+def list_scores(conn: sqlite3.Connection, after_id: int = 0) -> list:
     rows = conn.execute(
         '''
         SELECT s.id, s.participant_id, p.name as participant_name, s.judge_name, s.criteria_json, s.comment, s.created_at
         FROM scores s
         JOIN participants p ON p.id = s.participant_id
+        WHERE s.id > ?
         ORDER BY s.id DESC
-        '''
+        ''',
+        (after_id,),
     ).fetchall()
     out = []
     for r in rows:
@@ -234,52 +650,96 @@ def list_scores(conn: sqlite3.Connection) -> list:
     return out
 
 
-def judge_has_scored(conn: sqlite3.Connection, judge_name: str, participant_id: int) -> bool:
+def page_scores(conn: sqlite3.Connection, before: int = None, limit: int = 50, participant_id: int = None) -> tuple:
+    """Newest-first scores with id < before, and the cursor for the next page (None at the end).
+
+    Keyset pagination: each page is one index range scan, however deep it is.
+    """
+    limit = max(1, min(PAGE_SIZE_MAX, limit))
+    sql = '''
+        SELECT s.id, s.participant_id, p.name as participant_name, s.judge_name, s.criteria_json, s.comment, s.created_at
+        FROM scores s
+        JOIN participants p ON p.id = s.participant_id
+        WHERE s.id < ?
+    '''
+    params = [before if before is not None else 1 << 62]
+    if participant_id is not None:
+        sql += " AND s.participant_id = ?"  # served by idx_scores_participant_id
+        params.append(participant_id)
+    rows = conn.execute(sql + " ORDER BY s.id DESC LIMIT ?", (*params, limit + 1)).fetchall()
+    items = []
+    for r in rows[:limit]:
+        d = dict(r)
+        d["criteria"] = json.loads(d.pop("criteria_json"))
+        items.append(d)
+    return items, (items[-1]["id"] if len(rows) > limit else None)
+
+
+def get_score_by_client_id(conn: sqlite3.Connection, client_id: str):
+    """The score a client already submitted under this id (a retry), or None."""
     row = conn.execute(
-        "SELECT 1 FROM scores WHERE judge_name=? AND participant_id=? LIMIT 1",
-        (judge_name, participant_id),
+        "SELECT id, participant_id, judge_name, criteria_json, comment, created_at FROM scores WHERE client_id=?",
+        (client_id,),
     ).fetchone()
-    return row is not None
+    if row is None:
+        return None
+    d = dict(row)
+    d["criteria"] = json.loads(d.pop("criteria_json"))
+    return d
 
 
-def add_score(conn: sqlite3.Connection, participant_id: int, judge_name: str, criteria: dict, comment: str = "") -> int:
-    judge_name = (judge_name or "").strip()
-    if not judge_name:
-        raise ValueError("Judge name required.")
-    comment = (comment or "").strip()
+def judge_has_scored(conn: sqlite3.Connection, judge_name: str, participant_id: int) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM scores WHERE participant_id=? AND judge_name=? LIMIT 1",
+        (participant_id, judge_name),
+    ).fetchone()
+    return row is not None
 
-    settings = get_settings(conn)
-    if not settings.get("voting_open", True):
-        raise ValueError("Voting is currently closed.")
-    if not settings.get("allow_multiple_scores_per_judge", False):
-        if judge_has_scored(conn, judge_name, participant_id):
-            raise ValueError("You already scored this participant.")
 
-    criteria_json = json.dumps(criteria)
-    now = utc_now_iso()
+def insert_score(
+    conn: sqlite3.Connection,
+    participant_id: int,
+    judge_name: str,
+    criteria: dict,
+    comment: str = "",
+    created_at: str = None,
+    exclusive: bool = False,
+    client_id: str = None,
+) -> int:
+    """Write a score and its score_values rows with no validation or event.
+
+    The first score by a judge for a participant is flagged first_for_judge=1,
+    which the partial unique index ux_scores_first_for_judge keeps unique.
+    With exclusive=True the row always claims that flag, so a repeat raises
+    sqlite3.IntegrityError instead of being stored as a second score.
+    """
+    first = "1" if exclusive else (
+        "(SELECT CASE WHEN EXISTS (SELECT 1 FROM scores WHERE participant_id=:pid AND judge_name=:judge "
+        "AND first_for_judge=1) THEN NULL ELSE 1 END)"
+    )
     cur = conn.execute(
-        "INSERT INTO scores (participant_id, judge_name, criteria_json, comment, created_at) VALUES (?,?,?,?,?)",
-        (participant_id, judge_name, criteria_json, comment, now),
+        "INSERT INTO scores (participant_id, judge_name, criteria_json, comment, created_at, first_for_judge, client_id) "
+        f"VALUES (:pid, :judge, :criteria, :comment, :created_at, {first}, :client_id)",
+        {
+            "pid": participant_id,
+            "judge": judge_name,
+            "criteria": json.dumps(criteria),
+            "comment": comment,
+            "created_at": created_at or utc_now_iso(),
+            "client_id": client_id,
+        },
     )
     score_id = int(cur.lastrowid)
-    add_event(conn, "score_added", {"participant_id": participant_id, "judge_name": judge_name, "score_id": score_id})
+    conn.executemany(
+        "INSERT INTO score_values (score_id, participant_id, criterion_key, value) VALUES (?,?,?,?)",
+        [(score_id, participant_id, k, float(v)) for k, v in criteria.items() if v is not None],
+    )
     return score_id
 
 
-def delete_score(conn: sqlite3.Connection, score_id: int) -> None:
-    row = conn.execute("SELECT participant_id, judge_name FROM scores WHERE id=?", (score_id,)).fetchone()
-    conn.execute("DELETE FROM scores WHERE id=?", (score_id,))
-    add_event(conn, "score_deleted", {"score_id": score_id, "participant_id": row["participant_id"] if row else None, "judge_name": row["judge_name"] if row else None})
-
-def judge_has_scored(conn: sqlite3.Connection, judge_name: str, participant_id: int) -> bool:
-    row = conn.execute(
-        "SELECT 1 FROM scores WHERE judge_name=? AND participant_id=? LIMIT 1",
-        (judge_name, participant_id),
-    ).fetchone()
-    return row is not None
-
-
-def add_score(conn: sqlite3.Connection, participant_id: int, judge_name: str, criteria: dict, comment: str = "") -> int:
+def add_score(
+    conn: sqlite3.Connection, participant_id: int, judge_name: str, criteria: dict, comment: str = "", client_id: str = None
+) -> int:
     judge_name = (judge_name or "").strip()
     if not judge_name:
         raise ValueError("Judge name required.")
@@ -288,71 +748,84 @@ def add_score(conn: sqlite3.Connection, participant_id: int, judge_name: str, cr
     settings = get_settings(conn)
     if not settings.get("voting_open", True):
         raise ValueError("Voting is currently closed.")
-    if not settings.get("allow_multiple_scores_per_judge", False):
-        if judge_has_scored(conn, judge_name, participant_id):
-            raise ValueError("You already scored this participant.")
-
-    criteria_json = json.dumps(criteria)
-    now = utc_now_iso()
-    cur = conn.execute(
-        "INSERT INTO scores (participant_id, judge_name, criteria_json, comment, created_at) VALUES (?,?,?,?,?)",
-        (participant_id, judge_name, criteria_json, comment, now),
-    )
-    score_id = int(cur.lastrowid)
-    add_event(conn, "score_added", {"participant_id": participant_id, "judge_name": judge_name, "score_id": score_id})
+    exclusive = not settings.get("allow_multiple_scores_per_judge", False)
+    try:
+        # One indexed insert both checks and claims the judge's slot; no separate SELECT to race with.
+        score_id = insert_score(conn, participant_id, judge_name, criteria, comment, exclusive=exclusive, client_id=client_id)
+    except sqlite3.IntegrityError:
+        raise ValueError("You already scored this participant.")
+    # The values ride along so replay.py can rebuild the leaderboard from events alone.
+    add_event(conn, "score_added", {"participant_id": participant_id, "judge_name": judge_name, "score_id": score_id, "criteria": criteria})
     return score_id
 
 
 def delete_score(conn: sqlite3.Connection, score_id: int) -> None:
-    row = conn.execute("SELECT participant_id, judge_name FROM scores WHERE id=?", (score_id,)).fetchone()
+    row = conn.execute("SELECT participant_id, judge_name, criteria_json, first_for_judge FROM scores WHERE id=?", (score_id,)).fetchone()
     conn.execute("DELETE FROM scores WHERE id=?", (score_id,))
-    add_event(conn, "score_deleted", {"score_id": score_id, "participant_id": row["participant_id"] if row else None, "judge_name": row["judge_name"] if row else None})
+    if row and row["first_for_judge"]:
+        # Hand the judge's slot to their next remaining score, if any.
+        conn.execute(
+            '''
+            UPDATE scores SET first_for_judge=1 WHERE id = (
+                SELECT MIN(id) FROM scores WHERE participant_id=? AND judge_name=?
+            )
+            ''',
+            (row["participant_id"], row["judge_name"]),
+        )
+    add_event(conn, "score_deleted", {
+        "score_id": score_id,
+        "participant_id": row["participant_id"] if row else None,
+        "judge_name": row["judge_name"] if row else None,
+        "criteria": json.loads(row["criteria_json"]) if row else None,
+    })
+
+def score_totals(conn: sqlite3.Connection) -> dict:
+    """{participant_id: {"num_scores": n, "totals": {criterion: sum}}} from the summary tables."""
+    out = {}
+    for r in conn.execute("SELECT participant_id, num_scores FROM score_counts WHERE num_scores > 0"):
+        out[r["participant_id"]] = {"num_scores": r["num_scores"], "totals": {}}
+    for r in conn.execute("SELECT participant_id, criterion_key, total FROM score_totals WHERE n > 0"):
+        if r["participant_id"] in out:
+            out[r["participant_id"]]["totals"][r["criterion_key"]] = r["total"]
+    return out
 
 
 def compute_leaderboard(conn: sqlite3.Connection) -> list:
+    # Reads only the per-participant summary rows, so the cost tracks participants, not scores.
     settings = get_settings(conn)
     criteria_cfg = settings.get("criteria") or DEFAULT_CRITERIA
-    weights = {c["key"]: float(c.get("weight", 1.0)) for c in criteria_cfg}
-
-    participants = list_participants(conn, include_inactive=True)
-    scores = list_scores(conn)
-
-    by_pid = {
-        p["id"]: {
-            "participant_id": p["id"],
-            "name": p["name"],
-            "active": bool(p["active"]),
-            "num_scores": 0,
-            "totals": {},
-            "weighted_total": 0.0,
-        }
-        for p in participants
-    }
+    weights = json.dumps([{"key": c["key"], "weight": float(c.get("weight", 1.0))} for c in criteria_cfg])
 
-    for s in scores:
-        pid = s["participant_id"]
-        if pid not in by_pid:
-            continue
-        by_pid[pid]["num_scores"] += 1
-        crit = s.get("criteria") or {}
-        for k, v in crit.items():
-            by_pid[pid]["totals"][k] = by_pid[pid]["totals"].get(k, 0.0) + float(v)
-
-    for pid, row in by_pid.items():
-        n = row["num_scores"]
-        if n <= 0:
-            continue
-        weighted = 0.0
-        for k, total in row["totals"].items():
-            avg = total / n
-            weighted += avg * weights.get(k, 1.0)
-        row["weighted_total"] = round(weighted, 3)
-
-    leaderboard = sorted(
-        by_pid.values(),
-        key=lambda r: (r["active"], r["weighted_total"], r["num_scores"]),
-        reverse=True,
-    )
+    rows = conn.execute(
+        '''
+        SELECT p.id AS participant_id, p.name, p.active,
+               COALESCE(c.num_scores, 0) AS num_scores,
+               COALESCE(SUM(t.total * COALESCE(w.weight, 1.0)) / NULLIF(c.num_scores, 0), 0.0) AS weighted_total,
+               json_group_object(t.criterion_key, t.total) FILTER (WHERE t.n > 0) AS totals_json
+        FROM participants p
+        LEFT JOIN score_counts c ON c.participant_id = p.id
+        LEFT JOIN score_totals t ON t.participant_id = p.id
+        LEFT JOIN (
+            SELECT json_extract(value, '$.key') AS k, json_extract(value, '$.weight') AS weight
+            FROM json_each(?)
+        ) w ON w.k = t.criterion_key
+        GROUP BY p.id
+        ''',
+        (weights,),
+    ).fetchall()
+
+    leaderboard = [
+        {
+            "participant_id": r["participant_id"],
+            "name": r["name"],
+            "active": bool(r["active"]),
+            "num_scores": r["num_scores"],
+            "totals": json.loads(r["totals_json"] or "{}"),
+            "weighted_total": round(r["weighted_total"], 3),
+        }
+        for r in rows
+    ]
+    leaderboard.sort(key=lambda r: (r["active"], r["weighted_total"], r["num_scores"]), reverse=True)
     return leaderboard
 
 def export_all(conn: sqlite3.Connection) -> dict:
@@ -366,45 +839,696 @@ def export_all(conn: sqlite3.Connection) -> dict:
     }
 
 
-def import_all(conn: sqlite3.Connection, payload: dict, mode: str = "replace") -> None:
-    if mode not in ("replace", "merge"):
-        mode = "replace"
+# ---- Streaming export ----
+EXPORT_FETCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 64 * 1024  # characters buffered before a chunk is handed out
 
-    if mode == "replace":
-        conn.executescript(
-            """
-            DELETE FROM scores;
-            DELETE FROM desserts;
-            DELETE FROM participants;
-            DELETE FROM settings;
-            DELETE FROM events;
-            """
-        )
 
-    settings = payload.get("settings") or {}
-    for k, v in settings.items():
-        set_setting(conn, k, v)
+def _iter_rows(conn: sqlite3.Connection, sql: str, params=()):
+    cur = conn.execute(sql, params)
+    while True:
+        rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+        if not rows:
+            return
+        for r in rows:
+            yield dict(r)
+
+
+def _iter_scores(conn: sqlite3.Connection):
+    for d in _iter_rows(
+        conn,
+        '''
+        SELECT s.id, s.participant_id, p.name as participant_name, s.judge_name, s.criteria_json, s.comment, s.created_at
+        FROM scores s
+        JOIN participants p ON p.id = s.participant_id
+        ORDER BY s.id DESC
+        ''',
+    ):
+        d["criteria"] = json.loads(d.pop("criteria_json"))
+        yield d
+
 
-    for p in payload.get("participants") or []:
-        upsert_participant(conn, p.get("name", ""), active=bool(p.get("active", 1)))
+def _export_sections(conn: sqlite3.Connection) -> list:
+    # Same layout as export_all; list sections are lazy cursors rather than lists.
+    return [
+        ("exported_at", utc_now_iso()),
+        ("participants", _iter_rows(conn, "SELECT * FROM participants ORDER BY active DESC, name ASC")),
+        ("desserts", _iter_rows(
+            conn,
+            '''
+            SELECT d.id, d.participant_id, p.name as participant_name, d.dessert_name, d.description, d.category, d.created_at
+            FROM desserts d
+            JOIN participants p ON p.id = d.participant_id
+            ORDER BY p.active DESC, p.name ASC
+            ''',
+        )),
+        ("scores", _iter_scores(conn)),
+        ("settings", get_settings(conn)),
+        ("events", iter(list_events(conn, limit=500))),
+    ]
+
+
+def iter_export(conn: sqlite3.Connection, fmt: str = "json"):
+    """Yield an export as text chunks, reading rows from cursors as it goes.
+
+    fmt="json" produces the same document as export_all; fmt="ndjson" writes
+    one {"section": ..., "data": ...} object per line.
+    """
+    def pieces():
+        sections = _export_sections(conn)
+        if fmt == "ndjson":
+            for section, value in sections:
+                for item in value if isinstance(value, Iterator) else (value,):
+                    yield json.dumps({"section": section, "data": item}) + "\n"
+            return
+        yield "{"
+        for i, (section, value) in enumerate(sections):
+            yield ("," if i else "") + json.dumps(section) + ":"
+            if isinstance(value, Iterator):
+                yield "["
+                for j, item in enumerate(value):
+                    yield ("," if j else "") + json.dumps(item)
+                yield "]"
+            else:
+                yield json.dumps(value)
+        yield "}"
+
+    buf, size = [], 0
+    for piece in pieces():
+        buf.append(piece)
+        size += len(piece)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield "".join(buf)
+
+
+def gzip_chunks(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def stream_export(fmt: str = "json", compress: bool = False, competition: str = None):
+    """Bytes of a full export from one consistent read snapshot, on a pooled reader."""
+    with read(competition) as conn:
+        conn.execute("BEGIN")  # hold one snapshot across every section
+        chunks = (c.encode("utf-8") for c in iter_export(conn, fmt))
+        yield from gzip_chunks(chunks) if compress else chunks
+
+
+def backup_dir() -> str:
+    path = os.path.join(get_data_dir(), "backups")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _file_prefix(competition):
+    # Backup and archive files of the default competition keep their original names.
+    competition = competition or DEFAULT_COMPETITION
+    return "" if competition == DEFAULT_COMPETITION else f"{competition}-"
+
+
+BACKUP_STEP_PAGES = int(os.getenv("BACKUP_STEP_PAGES", "256"))  # pages copied per step of an online backup
+BACKUP_STEP_PAUSE = float(os.getenv("BACKUP_STEP_PAUSE_MS", "5")) / 1000  # rest between steps, so requests run
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "48"))  # newest database backups kept per competition (0 = keep all)
+COPY_CHUNK_SIZE = 1 << 20
+
+
+def snapshot_db(dest: str, competition: str = None) -> dict:
+    """Copy the live database into the file `dest` with SQLite's online backup API.
+
+    The copy is made BACKUP_STEP_PAGES pages at a time from its own
+    connection, outside the pool: no pooled connection and no lock of ours
+    is held while it runs, and the read transaction kept open across the
+    steps is the one consistent WAL snapshot being copied, which writers
+    never wait on. Between steps it sleeps (a green sleep under eventlet)
+    so the process keeps serving requests.
+    """
+    started = time.perf_counter()
+    steps = 0
+
+    def progress(status, remaining, total):
+        nonlocal steps
+        steps += 1
+        time.sleep(BACKUP_STEP_PAUSE)
+
+    src = _open(db_path(competition), readonly=True)
+    try:
+        src.execute("BEGIN")
+        src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()  # starts the read snapshot
+        with closing(sqlite3.connect(dest)) as dst:
+            src.backup(dst, pages=max(1, BACKUP_STEP_PAGES), progress=progress)
+            pages = dst.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        src.close()
+    return {"pages": pages, "steps": steps, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _copy_gzip(src_path: str, dest_path: str) -> None:
+    # A megabyte at a time, yielding in between, so a large file never stalls other requests.
+    with open(src_path, "rb") as src, gzip.open(dest_path, "wb", compresslevel=6) as dst:
+        while chunk := src.read(COPY_CHUNK_SIZE):
+            dst.write(chunk)
+            time.sleep(0)
+
+
+def _temp_file(suffix: str) -> str:
+    # A fresh name in the backups directory per call, so backups running at once never share one.
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=backup_dir())
+    os.close(fd)
+    return path
+
+
+def _remove_db_file(path: str) -> None:
+    for p in (path, path + "-wal", path + "-shm", path + "-journal"):
+        try:
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+
+
+def create_backup(competition: str = None) -> dict:
+    """Write a timestamped, gzipped copy of the database to ${DATA_DIR}/backups/ and rotate old ones."""
+    with metrics.BACKUP_SECONDS.time():
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S-%f")  # microseconds: never reused
+        path = os.path.join(backup_dir(), f"{_file_prefix(competition) or 'bakeoff-'}{stamp}.sqlite3.gz")
+        raw, packed = _temp_file(".sqlite3.tmp"), _temp_file(".sqlite3.gz.tmp")
+        try:
+            report = snapshot_db(raw, competition)
+            _copy_gzip(raw, packed)
+            os.replace(packed, path)
+        finally:
+            _remove_db_file(raw)
+            _remove_db_file(packed)
+    report.update(path=path, bytes=os.path.getsize(path), removed=rotate_backups(competition))
+    return report
+
+
+def list_backups(competition: str = None) -> list:
+    """This competition's database backups, newest first."""
+    name = re.compile(re.escape(_file_prefix(competition) or "bakeoff-") + r"\d{8}-\d{6}(-\d{6})?\.sqlite3\.gz$")
+    return sorted((os.path.join(backup_dir(), n) for n in os.listdir(backup_dir()) if name.match(n)), reverse=True)
+
+
+def rotate_backups(competition: str = None, keep: int = BACKUP_KEEP) -> list:
+    if keep <= 0:
+        return []
+    removed = list_backups(competition)[keep:]
+    for path in removed:
+        _remove_db_file(path)  # a backup running alongside may be rotating the same files
+    return removed
+
+
+def stream_db(competition: str = None, compress: bool = False):
+    """Bytes of a consistent copy of the database file, read back in chunks (memory use stays flat).
+
+    The copy goes to a temporary file next to the backups first (the live
+    file plus its WAL is not a single consistent file) and is deleted once
+    streamed.
+    """
+    tmp = _temp_file(".sqlite3.tmp")
+    try:
+        snapshot_db(tmp, competition)
+        with open(tmp, "rb") as f:
+            chunks = iter(lambda: f.read(EXPORT_CHUNK_SIZE), b"")
+            yield from gzip_chunks(chunks) if compress else chunks
+    finally:
+        _remove_db_file(tmp)
 
-    name_to_id = {p["name"]: p["id"] for p in list_participants(conn, include_inactive=True)}
 
-    for d in payload.get("desserts") or []:
-        pid = d.get("participant_id")
-        if pid is None:
-            pid = name_to_id.get(d.get("participant_name", ""))
-        if pid:
-            upsert_dessert(conn, int(pid), d.get("dessert_name", ""), d.get("description", ""), d.get("category", ""))
+# ---- Leaderboard snapshots ----
+SNAPSHOT_EVERY = int(os.getenv("SNAPSHOT_EVERY", "500"))  # events between automatic snapshots (see replay.py)
 
-    for s in payload.get("scores") or []:
-        pid = s.get("participant_id")
-        if pid is None:
-            pid = name_to_id.get(s.get("participant_name", ""))
-        if pid:
+
+def snapshot_state(conn: sqlite3.Connection) -> dict:
+    """The replayable leaderboard state, read from the live tables."""
+    return {
+        "participants": {
+            str(r["id"]): {"name": r["name"], "active": bool(r["active"])}
+            for r in conn.execute("SELECT id, name, active FROM participants")
+        },
+        "aggs": {
+            str(pid): {"count": t["num_scores"], **t["totals"]}
+            for pid, t in score_totals(conn).items()
+        },
+    }
+
+
+def take_snapshot(conn: sqlite3.Connection) -> int:
+    """Record the current state as of the newest event; returns that event id."""
+    head = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+    conn.execute(
+        "INSERT OR REPLACE INTO leaderboard_snapshots (event_id, created_at, state_json) VALUES (?,?,?)",
+        (head, utc_now_iso(), json.dumps(snapshot_state(conn))),
+    )
+    return head
+
+
+def snapshot_if_due(conn: sqlite3.Connection, every: int = SNAPSHOT_EVERY) -> None:
+    # Two primary-key lookups; cheap enough to run in every write transaction.
+    last = conn.execute("SELECT MAX(event_id) FROM leaderboard_snapshots").fetchone()[0]
+    head = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+    if last is None or head - last >= every:
+        take_snapshot(conn)
+
+
+# ---- Retention ----
+def archive_dir() -> str:
+    path = os.path.join(get_data_dir(), "archive")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def archive_events(older_than_days: float = EVENT_RETENTION_DAYS, competition: str = None) -> dict:
+    """Move events older than the cutoff into gzipped NDJSON files under ${DATA_DIR}/archive/.
+
+    Works oldest-first in batches of ARCHIVE_BATCH_SIZE, one write
+    transaction and one file each, named by the event ids it holds
+    (events-<first id>-<last id>.ndjson.gz); an existing file is never
+    overwritten.
+    """
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    report = {"archived": 0, "files": []}
+    with connect(competition) as conn:
+        if conn.execute("SELECT 1 FROM events WHERE created_at < ? LIMIT 1", (cutoff,)).fetchone():
+            # Replay can't cross archived events; from here on it starts at this snapshot or later.
+            set_setting(conn, "history_floor", take_snapshot(conn))
+    while True:
+        with connect(competition) as conn:
+            rows = conn.execute(
+                "SELECT id, event_type, payload_json, created_at FROM events WHERE created_at < ? "
+                "ORDER BY created_at, id LIMIT ?",  # served by idx_events_created_at
+                (cutoff, ARCHIVE_BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                break
+            ids = [r["id"] for r in rows]
+            name = f"{_file_prefix(competition)}events-{min(ids):010d}-{max(ids):010d}.ndjson.gz"
+            path = os.path.join(archive_dir(), name)
+            if os.path.exists(path):
+                raise FileExistsError(f"{path} already exists; not archiving these events again")
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+                for r in rows:
+                    f.write(json.dumps(_event_record(r)) + "\n")
+            conn.executemany("DELETE FROM events WHERE id = ?", ((r["id"],) for r in rows))
+        os.replace(path + ".tmp", path)  # only after the delete has committed
+        report["archived"] += len(rows)
+        report["files"].append(path)
+        if len(rows) < ARCHIVE_BATCH_SIZE:
+            break
+    return report
+
+
+def compact(competition: str = None) -> dict:
+    """Give free pages back to the filesystem and trim the WAL."""
+    path = db_path(competition)
+
+    def size():
+        return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+    before = size()
+    with maintenance(competition) as conn:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            # Databases created before auto_vacuum=INCREMENTAL need one full rebuild to switch.
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute("PRAGMA incremental_vacuum").fetchall()  # frees pages as its rows are stepped
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return {"bytes_before": before, "bytes_after": size()}
+
+
+def claim_run(conn: sqlite3.Connection, job: str, interval_s: float) -> bool:
+    """Claim this interval's run of a periodic job; False if another worker already has.
+
+    Call it inside connect(): BEGIN IMMEDIATE serializes the check and the
+    claim across processes, so of several workers waking up for the same
+    interval only the first goes ahead.
+    """
+    key = f"{job}_claimed_at"
+    row = conn.execute("SELECT v FROM settings WHERE k=?", (key,)).fetchone()
+    now = time.time()
+    if row and now - float(row["v"]) < interval_s / 2:
+        return False
+    set_setting(conn, key, now)
+    return True
+
+
+def run_retention(older_than_days: float = EVENT_RETENTION_DAYS, competition: str = None) -> dict:
+    report = archive_events(older_than_days, competition) if older_than_days > 0 else {"archived": 0, "files": []}
+    report.update(compact(competition))
+    return report
+
+
+# ---- Bulk import ----
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_MAX_ERRORS = 1000  # errors beyond this are counted but not listed
+EXPORT_SECTIONS = ("exported_at", "participants", "desserts", "scores", "settings", "events")
+# This database's own history and housekeeping; never imported from a file.
+LOCAL_SETTINGS = ("change_seq", "history_floor", "retention_claimed_at", "backup_claimed_at", "backup_seq")
+
+
+def iter_json_sections(f, chunk_size: int = 1 << 16):
+    """Yield (key, item) from a top-level JSON object without loading it whole.
+
+    Array values are yielded one element at a time; any other value is
+    yielded once. `f` is a text file object, read `chunk_size` chars at a time.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def peek():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos].isspace():
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if eof:
+                raise ValueError("Unexpected end of JSON input.")
+            fill()
+
+    def expect(chars):
+        nonlocal pos
+        c = peek()
+        if c not in chars:
+            raise ValueError(f"Expected {chars!r} at offset {pos}, found {c!r}.")
+        pos += 1
+        return c
+
+    def value():
+        nonlocal pos
+        peek()
+        while True:
             try:
-                add_score(conn, int(pid), s.get("judge_name", ""), s.get("criteria", {}) or {}, s.get("comment", ""))
-            except Exception:
-                pass
+                obj, end = decoder.raw_decode(buf, pos)
+                # a number at the very end of the buffer may continue in the next chunk
+                if end < len(buf) or eof:
+                    pos = end
+                    return obj
+            except ValueError:
+                if eof:
+                    raise
+            fill()
+
+    expect("{")
+    if peek() == "}":
+        return
+    while True:
+        key = value()
+        expect(":")
+        if peek() == "[":
+            expect("[")
+            if peek() == "]":
+                expect("]")
+            else:
+                while True:
+                    yield key, value()
+                    if expect(",]") == "]":
+                        break
+        else:
+            yield key, value()
+        if expect(",}") == "}":
+            break
+    # Only whitespace may follow the object; anything else means this isn't one JSON export.
+    while True:
+        while pos < len(buf) and buf[pos].isspace():
+            pos += 1
+        if pos < len(buf):
+            raise ValueError(f"Unexpected data after the JSON object at offset {pos}.")
+        if eof:
+            return
+        fill()
+
+
+def _drop_summary_triggers(conn: sqlite3.Connection) -> None:
+    for name in SUMMARY_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def _create_summary_triggers(conn: sqlite3.Connection) -> None:
+    for ddl in SUMMARY_TRIGGERS.values():
+        conn.execute(ddl)
+
+
+def _bulk_import(conn: sqlite3.Connection, items, mode: str = "replace") -> dict:
+    """Load (section, item) pairs in the caller's transaction.
+
+    Rows go in with executemany, per-row events are skipped and the summary
+    triggers are suspended; aggregates are rebuilt once at the end. Bad rows
+    are reported rather than aborting the import. A file that isn't an
+    export (an unknown section, unreadable JSON, or a replace with no
+    participants or scores) raises ValueError, and the caller's rollback
+    leaves the existing data untouched.
+    """
+    if mode not in ("replace", "merge"):
+        mode = "replace"
+    started = time.perf_counter()
+    report = {"mode": mode, "participants": 0, "desserts": 0, "scores": 0, "settings": 0, "errors": [], "error_count": 0}
+    counters = {"participants": 0, "desserts": 0, "scores": 0}
+
+    def error(section, index, msg):
+        report["error_count"] += 1
+        if len(report["errors"]) < IMPORT_MAX_ERRORS:
+            report["errors"].append({"section": section, "index": index, "error": msg})
+
+    # Nothing is deleted until the first section has shown this is an export.
+    items = iter(items)
+    first = next(items, None)
+    if first is None or first[0] not in EXPORT_SECTIONS:
+        raise ValueError("Not a bakeoff export" + (f" (unexpected section {first[0]!r})." if first else " (no records)."))
+    items = itertools.chain([first], items)
+
+    _drop_summary_triggers(conn)
+    if mode == "replace":
+        for table in ("score_values", "scores", "desserts", "participants", "score_counts", "score_totals", "events", "leaderboard_snapshots"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("DELETE FROM settings WHERE k != 'change_seq'")
+
+    # Merging follows this database's rules: a judge's second score for someone is refused unless
+    # allowed, and a score already here (same participant, judge and time) isn't added twice.
+    exclusive = mode == "merge" and not get_settings(conn).get("allow_multiple_scores_per_judge", False)
+    claimed, merged = set(), set()
+
+    names = {r["name"]: r["id"] for r in conn.execute("SELECT id, name FROM participants")}
+    old_ids = {}  # participant ids in the file -> ids here
+    next_score_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM scores").fetchone()[0]
+    now = utc_now_iso()
+    pending = {"participants": [], "desserts": [], "scores": []}
+
+    def resolve(row):
+        name = row.get("participant_name")
+        if name in names:
+            return names[name]
+        return old_ids.get(row.get("participant_id"))
+
+    def flush_participants():
+        rows = pending["participants"]
+        conn.executemany(
+            "INSERT INTO participants (name, active, created_at) VALUES (?,?,?) "
+            "ON CONFLICT(name) DO UPDATE SET active=excluded.active",
+            [(name, active, created) for _, name, active, created, _ in rows],
+        )
+        placeholders = ",".join("?" * len(rows))
+        for r in conn.execute(f"SELECT id, name FROM participants WHERE name IN ({placeholders})", [r[1] for r in rows]):
+            names[r["name"]] = r["id"]
+        for _, name, _, _, old_id in rows:
+            if old_id is not None:
+                old_ids[old_id] = names[name]
+        report["participants"] += len(rows)
+
+    def flush_desserts():
+        conn.executemany(
+            '''
+            INSERT INTO desserts (participant_id, dessert_name, description, category, created_at)
+            VALUES (?,?,?,?,?)
+            ON CONFLICT(participant_id) DO UPDATE SET
+                dessert_name=excluded.dessert_name,
+                description=excluded.description,
+                category=excluded.category
+            ''',
+            [row for _, row in pending["desserts"]],
+        )
+        report["desserts"] += len(pending["desserts"])
+
+    def flush_scores():
+        nonlocal next_score_id
+        score_rows, value_rows = [], []
+        for _, (pid, judge, criteria, comment, created) in pending["scores"]:
+            sid = next_score_id
+            next_score_id += 1
+            score_rows.append((sid, pid, judge, json.dumps(criteria), comment, created, pid, judge))
+            value_rows.extend((sid, pid, k, v) for k, v in criteria.items())
+        # first_for_judge is worked out per row, against rows inserted earlier in the same batch too.
+        conn.executemany(
+            "INSERT INTO scores (id, participant_id, judge_name, criteria_json, comment, created_at, first_for_judge) "
+            "VALUES (?,?,?,?,?,?, (SELECT CASE WHEN EXISTS (SELECT 1 FROM scores WHERE participant_id=? AND judge_name=? "
+            "AND first_for_judge=1) THEN NULL ELSE 1 END))",
+            score_rows,
+        )
+        conn.executemany(
+            "INSERT INTO score_values (score_id, participant_id, criterion_key, value) VALUES (?,?,?,?)",
+            value_rows,
+        )
+        report["scores"] += len(score_rows)
+
+    flushers = {"participants": flush_participants, "desserts": flush_desserts, "scores": flush_scores}
+
+    def flush(section):
+        if not pending[section]:
+            return
+        try:
+            conn.execute("SAVEPOINT import_batch")
+            flushers[section]()
+            conn.execute("RELEASE import_batch")
+        except sqlite3.Error:
+            # Retry the batch one row at a time to pin the failure on specific rows.
+            conn.execute("ROLLBACK TO import_batch")
+            conn.execute("RELEASE import_batch")
+            rows = pending[section]
+            for row in rows:
+                pending[section] = [row]
+                try:
+                    conn.execute("SAVEPOINT import_row")
+                    flushers[section]()
+                    conn.execute("RELEASE import_row")
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO import_row")
+                    conn.execute("RELEASE import_row")
+                    error(section, row[0], str(e))
+        pending[section] = []
+
+    for section, item in items:
+        if section == "settings":
+            if isinstance(item, dict):
+                for k, v in item.items():
+                    if k not in LOCAL_SETTINGS:
+                        set_setting(conn, k, v)
+                        report["settings"] += 1
+            continue
+        if section not in EXPORT_SECTIONS:
+            raise ValueError(f"Not a bakeoff export (unexpected section {section!r}).")
+        if section not in pending:
+            continue  # exported_at, events
+        index = counters[section]
+        counters[section] += 1
+        if not isinstance(item, dict):
+            error(section, index, "Expected an object.")
+            continue
+        # Rows may refer to participants still sitting in the pending batch.
+        if section != "participants":
+            flush("participants")
+        if section == "participants":
+            name = (item.get("name") or "").strip()
+            if not name:
+                error(section, index, "Participant name required.")
+                continue
+            active = 1 if item.get("active", 1) else 0
+            pending[section].append((index, name, active, item.get("created_at") or now, item.get("id")))
+        elif section == "desserts":
+            pid = resolve(item)
+            dessert_name = (item.get("dessert_name") or "").strip()
+            if pid is None:
+                error(section, index, "Unknown participant.")
+                continue
+            if not dessert_name:
+                error(section, index, "Dessert name required.")
+                continue
+            pending[section].append((index, (
+                pid, dessert_name, (item.get("description") or "").strip(),
+                (item.get("category") or "").strip(), item.get("created_at") or now,
+            )))
+        else:
+            pid = resolve(item)
+            judge = (item.get("judge_name") or "").strip()
+            if pid is None:
+                error(section, index, "Unknown participant.")
+                continue
+            if not judge:
+                error(section, index, "Judge name required.")
+                continue
+            try:
+                criteria = {str(k): float(v) for k, v in (item.get("criteria") or {}).items() if v is not None}
+            except (TypeError, ValueError, AttributeError):
+                error(section, index, "Criteria must be numbers.")
+                continue
+            created = item.get("created_at") or now
+            if mode == "merge":
+                if (pid, judge, created) in merged or conn.execute(
+                    "SELECT 1 FROM scores WHERE participant_id=? AND judge_name=? AND created_at=? LIMIT 1",
+                    (pid, judge, created),  # served by idx_scores_participant_judge
+                ).fetchone():
+                    error(section, index, "Already imported.")
+                    continue
+                if exclusive and ((pid, judge) in claimed or judge_has_scored(conn, judge, pid)):
+                    error(section, index, "Judge already scored this participant.")
+                    continue
+                merged.add((pid, judge, created))
+                claimed.add((pid, judge))
+            pending[section].append((index, (
+                pid, judge, criteria, (item.get("comment") or "").strip(), created,
+            )))
+        if len(pending[section]) >= IMPORT_BATCH_SIZE:
+            flush(section)
+
+    for section in ("participants", "desserts", "scores"):
+        flush(section)
+    if mode == "replace" and not (report["participants"] or report["scores"]):
+        raise ValueError("The file has no participants or scores to import; nothing was replaced.")
+
+    rebuild_score_summary(conn)
+    _create_summary_triggers(conn)
+    elapsed = time.perf_counter() - started
+    rows = report["participants"] + report["desserts"] + report["scores"]
+    report["elapsed_s"] = round(elapsed, 3)
+    report["rows_per_sec"] = round(rows / elapsed) if elapsed > 0 else rows
+    add_event(conn, "import_completed", {
+        "mode": mode,
+        "participants": report["participants"],
+        "desserts": report["desserts"],
+        "scores": report["scores"],
+        "errors": report["error_count"],
+    })
+    return report
+
+
+def import_all(conn: sqlite3.Connection, payload: dict, mode: str = "replace") -> dict:
+    items = (
+        (key, item)
+        for key, value in payload.items()
+        for item in (value if isinstance(value, list) else [value])
+    )
+    return _bulk_import(conn, items, mode)
+
+
+def iter_ndjson_sections(f):
+    """Yield (section, item) from the ndjson export format, one line at a time."""
+    for n, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+            yield obj["section"], obj["data"]
+        except (ValueError, KeyError, TypeError):
+            raise ValueError(f"Line {n} is not an export record.")
+
 
-    add_event(conn, "import_completed", {"mode": mode})
+def import_stream(conn: sqlite3.Connection, f, mode: str = "replace", fmt: str = "json") -> dict:
+    """Like import_all, but reads an export file incrementally from a text stream."""
+    items = iter_ndjson_sections(f) if fmt == "ndjson" else iter_json_sections(f)
+    return _bulk_import(conn, items, mode)
@@ -0,0 +1,167 @@
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# Counters and histograms kept in memory and served as Prometheus text at /metrics.
+# Each process has its own; with several gunicorn workers every scrape sees one of them.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+# Seconds. Most of what is timed here is sub-millisecond, so the low end is fine-grained.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REGISTRY = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(v):
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = self._header()
+        for labels, value in series:
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A value set directly, or read from `fn` at scrape time (a number, or {label tuple: number})."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labels=(), fn=None):
+        super().__init__(name, help, labels)
+        self.fn = fn
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._series[labels] = value
+
+    def collect(self):
+        with self._lock:
+            series = dict(self._series)
+        if self.fn is not None:
+            value = self.fn()
+            series.update(value if isinstance(value, dict) else {(): value})
+        lines = self._header()
+        for labels, value in sorted(series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def collect(self):
+        lines = self._header()
+        with self._lock:
+            items = sorted((labels, ([*s[0]], s[1], s[2])) for labels, s in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="' + _number(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# ---- Hot-path metrics (observed in app.py, db.py, store.py and broadcast.py) ----
+HTTP_SECONDS = Histogram(
+    "bakeoff_http_request_duration_seconds", "Time to handle a request, by route pattern.", ("route", "method", "status")
+)
+DB_QUERY_SECONDS = Histogram("bakeoff_db_query_seconds", "SQLite statement execution time, by statement kind.", ("op",))
+DB_WAIT_SECONDS = Histogram("bakeoff_db_wait_seconds", "Time spent waiting for a pooled connection.", ("mode",))
+DB_HOLD_SECONDS = Histogram("bakeoff_db_hold_seconds", "Time a pooled connection was held (one transaction for the writer).", ("mode",))
+DB_POOLS_OPENED = Counter("bakeoff_db_pools_opened_total", "Competition databases opened (connection pools created).")
+DB_POOLS_EVICTED = Counter("bakeoff_db_pools_evicted_total", "Connection pools closed to stay within DB_MAX_OPEN.")
+BACKUP_SECONDS = Histogram("bakeoff_backup_seconds", "Online database backups, copy and compression.")
+STORE_SECONDS = Histogram("bakeoff_store_seconds", "Store loads and commits, including the database work.", ("op",))
+RANK_SECONDS = Histogram("bakeoff_leaderboard_rank_seconds", "Re-ranking the in-memory leaderboard after a change.", ("mode",))
+SERIALIZE_SECONDS = Histogram("bakeoff_serialize_seconds", "JSON encoding (and gzip) of cached read responses.", ("key",))
+SERIALIZE_BYTES = Histogram("bakeoff_serialize_bytes", "Size of freshly encoded read responses.", ("key",), buckets=BYTE_BUCKETS)
+EMIT_SECONDS = Histogram("bakeoff_socket_emit_seconds", "Time to hand one live update to its recipients.", ("event",))
+EMITS = Counter("bakeoff_socket_emits_total", "Live updates emitted.", ("event",))
+EMIT_RECIPIENTS = Counter("bakeoff_socket_emit_recipients_total", "Clients each live update was sent to (this worker's only).", ("event",))
+EMIT_BYTES = Counter("bakeoff_socket_emit_bytes_total", "JSON payload bytes sent, times recipients.", ("event",))
+
+
+def _rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, not current, off Linux
+
+
+Gauge("bakeoff_process_resident_memory_bytes", "Resident memory of this process.", fn=_rss)
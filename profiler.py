@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+try:
+    # Under eventlet every greenlet shares one OS thread, so the sampler needs a real
+    # thread of its own to look at it from the outside.
+    from eventlet import patcher
+    _threading = patcher.original("threading")
+except ImportError:
+    _threading = threading
+
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))  # how often the sampler looks at the stacks
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "300"))  # stops itself if left running
+MAX_DEPTH = 64
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame):
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return tuple(reversed(names))  # outermost first, as flame graphs expect
+
+
+class Sampler:
+    """A statistical profiler: a background thread records every thread's stack every few ms.
+
+    Nothing is traced, so the app runs at full speed between samples; the
+    cost is one walk of each stack per interval. Samples are kept as counts
+    per distinct stack, reported as the functions seen most (self and
+    inclusive) and exportable in the folded format flame graph tools read.
+    """
+
+    def __init__(self):
+        self._lock = _threading.Lock()
+        self._stop = None
+        self._reset(PROFILE_INTERVAL_MS)
+
+    def _reset(self, interval_ms):
+        self.stacks = Counter()
+        self.samples = 0
+        self.interval_ms = interval_ms
+        self.started_at = None
+        self.stopped_at = None
+
+    @property
+    def running(self):
+        return self._stop is not None and not self._stop.is_set()
+
+    def start(self, interval_ms=None):
+        with self._lock:
+            if self.running:
+                return
+            self._reset(max(1.0, float(interval_ms or PROFILE_INTERVAL_MS)))
+            self.started_at = time.time()
+            self._stop = stop = _threading.Event()
+        thread = _threading.Thread(target=self._run, args=(stop,), name="profiler", daemon=True)
+        thread.start()
+
+    def stop(self):
+        with self._lock:
+            if self.running:
+                self._stop.set()
+                self.stopped_at = time.time()
+
+    def _run(self, stop):
+        me = _threading.get_ident()
+        interval = self.interval_ms / 1000
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not stop.wait(interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident != me:
+                        self.stacks[_stack(frame)] += 1
+                self.samples += 1
+            frame = frames = None  # don't keep the sampled frames (and their locals) alive between samples
+            if time.monotonic() > deadline:
+                self.stop()
+
+    def report(self, limit=25) -> dict:
+        with self._lock:
+            stacks = list(self.stacks.items())
+        own, inclusive = Counter(), Counter()
+        for stack, n in stacks:
+            own[stack[-1]] += n
+            for name in set(stack):
+                inclusive[name] += n
+        total = sum(n for _, n in stacks) or 1
+        end = self.stopped_at if not self.running and self.stopped_at else time.time()
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "intervalMs": self.interval_ms,
+            "seconds": round(end - self.started_at, 1) if self.started_at else 0,
+            "top": [
+                {"function": name, "self": round(100 * n / total, 1), "total": round(100 * inclusive[name] / total, 1)}
+                for name, n in own.most_common(limit)
+            ],
+        }
+
+    def folded(self) -> str:
+        """One `outer;inner;leaf count` line per distinct stack (flamegraph.pl, speedscope)."""
+        with self._lock:
+            stacks = list(self.stacks.items())
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in sorted(stacks))
+
+
+sampler = Sampler()
@@ -0,0 +1,251 @@
+import json
+import sqlite3
+from datetime import datetime, timezone
+
+import db
+
+CRITERIA = tuple(c["key"] for c in db.DEFAULT_CRITERIA)
+TOP_N = 3  # rows included with each lead change
+
+
+class Replay:
+    """Leaderboard state as of one event id, advanced one event at a time.
+
+    Starts from a row of leaderboard_snapshots (see db.take_snapshot) and
+    applies the score and participant events recorded after it, so a
+    point-in-time query costs one snapshot read plus the events since.
+    """
+
+    def __init__(self, event_id, state):
+        self.event_id = event_id
+        self.participants = {int(k): dict(v) for k, v in state["participants"].items()}
+        self.aggs = {int(k): dict(v) for k, v in state["aggs"].items()}
+
+    def _participant_id(self, conn, payload):
+        pid = payload.get("id")
+        if pid is None:  # events written before ids were recorded
+            name = payload.get("name")
+            pid = next((i for i, p in self.participants.items() if p["name"] == name), None)
+            if pid is None:
+                row = conn.execute("SELECT id FROM participants WHERE name=?", (name,)).fetchone()
+                pid = row["id"] if row else None
+        return pid
+
+    def _criteria(self, conn, payload):
+        values = payload.get("criteria")
+        if values is None:  # older score events only carry the id; the row may still be there
+            values = {
+                r["criterion_key"]: r["value"]
+                for r in conn.execute("SELECT criterion_key, value FROM score_values WHERE score_id=?", (payload.get("score_id"),))
+            }
+        return {k: float(values.get(k) or 0) for k in CRITERIA} if values else None
+
+    def _add(self, pid, values, sign):
+        a = self.aggs.setdefault(pid, {"count": 0})
+        a["count"] += sign
+        for k, v in values.items():
+            a[k] = a.get(k, 0.0) + sign * v
+
+    def apply(self, conn, event):
+        """Apply one events row; returns True if the ranking may have changed."""
+        kind = event["event_type"]
+        payload = json.loads(event["payload_json"])
+        self.event_id = event["id"]
+        if kind in ("score_added", "score_deleted"):
+            pid = payload.get("participant_id")
+            values = self._criteria(conn, payload)
+            if pid is None or values is None:
+                return False
+            self._add(pid, values, 1 if kind == "score_added" else -1)
+            return True
+        if kind in ("participant_added", "participant_updated"):
+            pid = self._participant_id(conn, payload)
+            if pid is None:
+                return False
+            p = self.participants.setdefault(pid, {"name": payload.get("name"), "active": True})
+            if payload.get("name"):
+                p["name"] = payload["name"]
+            if "active" in payload:
+                p["active"] = bool(payload["active"])
+            return True
+        if kind == "participant_deleted":
+            pid = payload.get("id")
+            self.participants.pop(pid, None)
+            self.aggs.pop(pid, None)  # its scores went with it (ON DELETE CASCADE)
+            return True
+        return False
+
+    def leaderboard(self, desserts=None):
+        rows = []
+        for pid, p in self.participants.items():
+            if not p.get("active", True):
+                continue
+            a = self.aggs.get(pid) or {"count": 0}
+            n = a["count"]
+            sums = {k: a.get(k, 0.0) for k in CRITERIA}
+            rows.append({
+                "id": pid,
+                "name": p["name"],
+                "dessert": (desserts or {}).get(pid, "—"),
+                "count": n,
+                "avgTaste": sums["taste"] / n if n else 0,
+                "avgPresentation": sums["presentation"] / n if n else 0,
+                "avgSpirit": sums["spirit"] / n if n else 0,
+                "avgTotal": sum(sums.values()) / len(CRITERIA) / n if n else 0,
+            })
+        rows.sort(key=lambda r: (-r["avgTotal"], -r["count"], r["name"]))
+        for i, r in enumerate(rows):
+            r["rank"] = i + 1
+        return rows
+
+    def leader(self):
+        # Same order as leaderboard(): best average, then most scores, then name.
+        best = None
+        for pid, p in self.participants.items():
+            a = self.aggs.get(pid)
+            if not p.get("active", True) or not a or a["count"] <= 0:
+                continue
+            key = (-sum(a.get(k, 0.0) for k in CRITERIA) / len(CRITERIA) / a["count"], -a["count"], p["name"])
+            if best is None or key < best[0]:
+                best = (key, pid)
+        return best[1] if best else None
+
+
+# ---- queries ----
+def resolve_event_id(conn: sqlite3.Connection, at) -> int:
+    """`at` is an event id or an ISO timestamp; returns the last event id at or before it."""
+    if at is None:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+    try:
+        return int(at)
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = datetime.fromisoformat(str(at).replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError("Expected an event id or an ISO timestamp.")
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)  # stored times are UTC
+    at = when.astimezone(timezone.utc).isoformat()
+    row = conn.execute("SELECT MAX(id) FROM events WHERE created_at <= ?", (at,)).fetchone()
+    snap = conn.execute("SELECT MAX(event_id) FROM leaderboard_snapshots WHERE created_at <= ?", (at,)).fetchone()
+    return max(row[0] or 0, snap[0] or 0)
+
+
+def _start(conn, event_id):
+    # The nearest snapshot at or before event_id, never earlier than the archive floor. Before the
+    # first snapshot (taken after seeding or an import), that earliest snapshot is the start.
+    floor = int(db.get_settings(conn).get("history_floor", 0))
+    row = conn.execute(
+        "SELECT event_id, state_json FROM leaderboard_snapshots WHERE event_id <= ? ORDER BY event_id DESC LIMIT 1",
+        (max(event_id, floor),),
+    ).fetchone()
+    if row is None:
+        row = conn.execute(
+            "SELECT event_id, state_json FROM leaderboard_snapshots ORDER BY event_id LIMIT 1"
+        ).fetchone()
+    if row is None:
+        raise ValueError("No history that far back.")
+    return Replay(row["event_id"], json.loads(row["state_json"]))
+
+
+def _events(conn, after, until):
+    cur = conn.execute(
+        "SELECT id, event_type, payload_json, created_at FROM events WHERE id > ? AND id <= ? ORDER BY id",
+        (after, until),
+    )
+    while True:
+        rows = cur.fetchmany(db.EXPORT_FETCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+def _desserts(conn):
+    return {d["participant_id"]: d["dessert_name"] for d in db.get_desserts(conn)}
+
+
+def _event_time(conn, event_id):
+    row = conn.execute("SELECT created_at FROM events WHERE id=?", (event_id,)).fetchone()
+    if row is None:
+        row = conn.execute("SELECT created_at FROM leaderboard_snapshots WHERE event_id=?", (event_id,)).fetchone()
+    return row["created_at"] if row else None
+
+
+def leaderboard_at(conn: sqlite3.Connection, at=None) -> dict:
+    """The leaderboard as it stood after event `at` (an id or ISO timestamp; default: now)."""
+    target = resolve_event_id(conn, at)
+    state = _start(conn, target)
+    start = state.event_id
+    replayed = 0
+    for event in _events(conn, start, target):
+        state.apply(conn, event)
+        replayed += 1
+    exact = start <= target  # otherwise the events before `target` were archived; this is the earliest kept state
+    return {
+        "eventId": target if exact else start,
+        "at": _event_time(conn, state.event_id),
+        "exact": exact,
+        "replayed": replayed,
+        "leaderboard": state.leaderboard(_desserts(conn)),
+    }
+
+
+def lead_changes(conn: sqlite3.Connection, since=None, until=None) -> dict:
+    """Every point between `since` and `until` where first place changed hands, with the top rows then."""
+    if since is None:  # from the start of the recorded history
+        first = conn.execute("SELECT COALESCE(MIN(event_id), 0) FROM leaderboard_snapshots").fetchone()[0]
+    else:
+        first = resolve_event_id(conn, since)
+    last = resolve_event_id(conn, until)
+    state = _start(conn, first)
+    desserts = _desserts(conn)
+    leader = state.leader()
+    changes = []
+    for event in _events(conn, state.event_id, last):
+        if not state.apply(conn, event):
+            continue
+        current = state.leader()
+        if current != leader:
+            if event["id"] > first:
+                changes.append({
+                    "eventId": event["id"],
+                    "at": event["created_at"],
+                    "leader": current,
+                    "previous": leader,
+                    "top": state.leaderboard(desserts)[:TOP_N],
+                })
+            leader = current
+    return {"since": first, "until": last, "changes": changes}
+
+
+def rebuild_summary(conn: sqlite3.Connection) -> dict:
+    """Rebuild score_counts/score_totals from the latest snapshot plus the events after it.
+
+    The alternative to db.rebuild_score_summary's full rescan of score_values
+    when the running sums are suspect (e.g. after a crash mid-maintenance).
+    Runs in the caller's write transaction.
+    """
+    head = resolve_event_id(conn, None)
+    state = _start(conn, head)
+    start = state.event_id
+    replayed = 0
+    for event in _events(conn, state.event_id, head):
+        state.apply(conn, event)
+        replayed += 1
+    db._drop_summary_triggers(conn)
+    try:
+        conn.execute("DELETE FROM score_counts")
+        conn.execute("DELETE FROM score_totals")
+        existing = {r["id"] for r in conn.execute("SELECT id FROM participants")}
+        for pid, a in state.aggs.items():
+            if pid not in existing or a["count"] <= 0:
+                continue
+            conn.execute("INSERT INTO score_counts (participant_id, num_scores) VALUES (?,?)", (pid, a["count"]))
+            conn.executemany(
+                "INSERT INTO score_totals (participant_id, criterion_key, total, n) VALUES (?,?,?,?)",
+                [(pid, k, a.get(k, 0.0), a["count"]) for k in CRITERIA],
+            )
+    finally:
+        db._create_summary_triggers(conn)
+    return {"fromSnapshot": start, "replayed": replayed}
@@ -0,0 +1,128 @@
+try:
+    import numpy as np
+except ImportError:  # only the plain average is available without it
+    np = None
+
+# "scoring_mode" in the settings table, next to "criteria":
+#   average   - mean of every score's criteria (the running sums in store.py; no NumPy needed)
+#   weighted  - per-judge averages combined with the criteria weights, then averaged over judges
+#   zscore    - like weighted, after putting each judge's marks on a common scale (judge drift)
+#   trimmed   - like weighted, dropping each participant's highest and lowest judges ("scoring_trim")
+MODES = ("average", "weighted", "zscore", "trimmed")
+DEFAULT_TRIM = 0.1
+
+
+def available_modes():
+    return MODES if np is not None else MODES[:1]
+
+
+class ScoreMatrix:
+    """Scores packed into judge × participant × criterion arrays.
+
+    sums[j, p, c] and counts[j, p] are updated one score at a time as scores
+    arrive (a judge who scores someone twice is averaged), so re-ranking
+    after a change only runs the vectorized passes in rank(), never a loop
+    over the scores.
+    """
+
+    def __init__(self, criteria):
+        self.criteria = tuple(criteria)
+        self.judges = {}
+        self.participants = {}
+        self.sums = np.zeros((16, 16, len(self.criteria)))
+        self.counts = np.zeros((16, 16))
+
+    @classmethod
+    def from_scores(cls, scores, criteria):
+        m = cls(criteria)
+        for s in scores:
+            m.add(s)
+        return m
+
+    def _grow(self, judges, participants):
+        j, p = self.counts.shape
+        if judges <= j and participants <= p:
+            return
+        shape = (j if judges <= j else 2 * judges, p if participants <= p else 2 * participants)
+        sums = np.zeros(shape + (len(self.criteria),))
+        counts = np.zeros(shape)
+        sums[:j, :p] = self.sums
+        counts[:j, :p] = self.counts
+        self.sums, self.counts = sums, counts
+
+    def add(self, score):
+        judge = (score.get("judge") or "").strip().lower()
+        j = self.judges.setdefault(judge, len(self.judges))
+        p = self.participants.setdefault(score.get("participantId"), len(self.participants))
+        self._grow(len(self.judges), len(self.participants))
+        self.sums[j, p] += [float(score.get(k) or 0) for k in self.criteria]
+        self.counts[j, p] += 1
+
+
+def rank(matrix: ScoreMatrix, pids, mode="weighted", weights=None, trim=DEFAULT_TRIM) -> dict:
+    """Score every participant in `pids` under `mode`; returns {pid: {"score", "stability", "rankSpread"}}.
+
+    stability is the share of leave-one-judge-out rankings in which the
+    participant keeps its place, and rankSpread how far its place moves
+    across them: a lead that rests on a single judge shows up as < 1 and > 0.
+    """
+    pids = list(pids)
+    J, P = len(matrix.judges), len(matrix.participants)
+    if not pids or not J:
+        return {pid: {"score": 0.0, "stability": 1.0, "rankSpread": 0} for pid in pids}
+    counts = matrix.counts[:J, :P]
+    x = matrix.sums[:J, :P] / np.maximum(counts, 1)[..., None]  # each judge's mean per criterion (0 if none)
+    w = np.array([float((weights or {}).get(k, 1.0)) for k in matrix.criteria])
+    w = w / w.sum() if w.sum() > 0 else np.full(len(w), 1.0 / len(w))
+
+    if mode == "zscore":
+        # Each judge's marks (per criterion) relative to their own mean and spread over everyone they
+        # scored, then mapped back onto the raw scale so the numbers still read like marks out of 10.
+        n = np.maximum((counts > 0).sum(axis=1), 1)[:, None]
+        mu = x.sum(axis=1) / n
+        sd = np.sqrt(np.maximum(np.einsum("jpc,jpc->jc", x, x) / n - mu * mu, 0.0))
+        scale = np.where(sd > 1e-9, w / np.where(sd > 1e-9, sd, 1.0), 0.0)  # J × C
+        z = np.einsum("jpc,jc->jp", x, scale) - (mu * scale).sum(axis=1)[:, None]
+        raw = (x @ w)[counts > 0]
+        totals = raw.mean() + raw.std() * z
+    else:
+        totals = x @ w  # J × P
+
+    # Only the requested (active) participants from here on; ones with no scores yet get an empty column.
+    cols = np.array([matrix.participants.get(pid, P) for pid in pids])
+    totals = np.concatenate([totals, np.zeros((J, 1))], axis=1)[:, cols]
+    scored = np.concatenate([counts > 0, np.zeros((J, 1), dtype=bool)], axis=1)[:, cols]
+
+    keep = scored
+    if mode == "trimmed":
+        # Drop the lowest and highest floor(n * trim) judges of each participant.
+        n = scored.sum(axis=0)
+        k = np.floor(n * trim).astype(int)
+        order = np.argsort(np.where(scored, totals, np.inf), axis=0, kind="stable")
+        pos = np.arange(J)[:, None]
+        keep = np.zeros_like(scored)
+        np.put_along_axis(keep, order, (pos >= k) & (pos < n - k), axis=0)
+
+    contrib = np.where(keep, totals, 0.0)
+    n = keep.sum(axis=0)
+    total = contrib.sum(axis=0)
+    score = np.where(n > 0, total / np.maximum(n, 1), 0.0)
+
+    # Leave each judge out in turn: only the participants that judge counted for change.
+    loo = np.where(keep & (n > 1), (total - contrib) / np.maximum(n - 1, 1), np.where(keep, 0.0, score))
+    base = _ranks(score[None, :])[0]
+    ranks = _ranks(loo)
+    stability = (ranks == base).mean(axis=0)
+    spread = np.maximum(ranks.max(axis=0), base) - np.minimum(ranks.min(axis=0), base)
+    return {
+        pid: {"score": float(score[i]), "stability": round(float(stability[i]), 3), "rankSpread": int(spread[i])}
+        for i, pid in enumerate(pids)
+    }
+
+
+def _ranks(values):
+    # 1-based place of each column within its row, best first.
+    order = np.argsort(-values, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(1, values.shape[1] + 1)[None, :], axis=1)
+    return ranks
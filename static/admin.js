@@ -1,5 +1,8 @@
 (() => {
   const $ = (id) => document.getElementById(id);
+  // Served at / for the default competition and at /c/<id>/ for the others; the API lives under the same prefix.
+  const BASE = document.body.dataset.base || "";
+  const COMPETITION = document.body.dataset.competition || "default";
 
   const tbody = $("participantsTbody");
   const statusEl = $("adminStatus");
@@ -8,22 +11,19 @@
   const requirePassword = pwModal?.dataset?.require === "1";
 
   let unlocked = !requirePassword;
+  let adminPassword = "";
   let state = null;
 
+  function adminHeaders(extra) {
+    return { ...(extra || {}), "X-Admin-Password": adminPassword };
+  }
+
   function escapeHtml(s) {
     return String(s ?? "").replace(/[&<>"']/g, (c) => ({
       "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"
     }[c]));
   }
 
-  function slugify(name) {
-    return (name || "")
-      .toLowerCase()
-      .trim()
-      .replace(/\s+/g, "-")
-      .replace(/[^a-z0-9\-]/g, "");
-  }
-
   function showStatus(msg) {
     if (statusEl) statusEl.textContent = msg || "";
   }
@@ -31,7 +31,7 @@
   function renderTable(participants) {
     if (!tbody) return;
     tbody.innerHTML = participants.map((p, idx) => {
-      return `<tr data-idx="${idx}">
+      return `<tr data-idx="${idx}" data-id="${escapeHtml(p.id ?? "")}">
         <td><input class="input input-sm" value="${escapeHtml(p.name || "")}" data-field="name" placeholder="Name" /></td>
         <td><input class="input input-sm" value="${escapeHtml(p.dessert || "")}" data-field="dessert" placeholder="Dessert name" /></td>
         <td class="col-tight"><button class="btn btn-ghost btn-sm" data-action="remove" type="button">🗑️</button></td>
@@ -44,25 +44,190 @@
     const participants = rows.map((tr) => {
       const name = tr.querySelector('[data-field="name"]').value.trim();
       const dessert = tr.querySelector('[data-field="dessert"]').value.trim();
-      const id = slugify(name) || `p-${Math.random().toString(16).slice(2,8)}`;
+      const id = tr.dataset.id ? Number(tr.dataset.id) : null;
       return { id, name, dessert: dessert || "—" };
     }).filter(p => p.name);
     return participants;
   }
 
   async function fetchState() {
-    const res = await fetch("/api/state", { cache: "no-store" });
+    // "no-cache" revalidates with If-None-Match, so an unchanged state comes back as a bodyless 304
+    const res = await fetch(`${BASE}/api/state?scores=0`, { cache: "no-cache" });  // only the roster is needed here
     return await res.json();
   }
 
   async function saveParticipants(participants) {
-    const res = await fetch("/api/participants", {
+    const res = await fetch(`${BASE}/api/participants`, {
       method: "POST",
       headers: {"Content-Type":"application/json"},
       body: JSON.stringify(participants),
     });
     const data = await res.json();
-    if (!res.ok || !data.success) throw new Error("Save failed");
+    if (!res.ok || !data.success) throw new Error(data.error || "Save failed");
+  }
+
+  async function importBackup() {
+    const file = $("importFile")?.files?.[0];
+    const backupStatus = $("backupStatus");
+    if (!file) {
+      backupStatus.textContent = "Pick a JSON file first.";
+      return;
+    }
+    const mode = $("importMode")?.value || "replace";
+    backupStatus.textContent = "Importing…";
+    const params = new URLSearchParams({ mode, filename: file.name });
+    const res = await fetch(`${BASE}/api/admin/import?${params}`, {
+      method: "POST",
+      headers: adminHeaders({"Content-Type": "application/json"}),
+      body: file,
+    });
+    const data = await res.json();
+    if (!res.ok || !data.success) throw new Error(data.error || "Import failed");
+    const r = data.report;
+    backupStatus.textContent =
+      `Imported ${r.participants} participants, ${r.desserts} desserts, ${r.scores} scores ` +
+      `(${r.rows_per_sec} rows/s)` + (r.error_count ? ` • ${r.error_count} rows skipped` : "") + " ✅";
+    state = await fetchState();
+    renderTable(state.participants || []);
+  }
+
+  async function exportData() {
+    // fetch (not a plain link) so the admin password header goes along
+    const res = await fetch(`${BASE}/api/admin/export`, { headers: adminHeaders() });
+    if (!res.ok) throw new Error("Export failed");
+    const url = URL.createObjectURL(await res.blob());
+    const a = document.createElement("a");
+    a.href = url;
+    a.download = `bakeoff-export-${new Date().toISOString().slice(0, 10)}.json`;
+    a.click();
+    URL.revokeObjectURL(url);
+  }
+
+  async function createBackup() {
+    const res = await fetch(`${BASE}/api/admin/backup`, { method: "POST", headers: adminHeaders() });
+    const data = await res.json();
+    if (!res.ok || !data.success) throw new Error(data.error || "Backup failed");
+    $("backupStatus").textContent = `Backup written to ${data.path} (${Math.round(data.report.bytes / 1024)} KB) ✅`;
+  }
+
+  async function downloadDb() {
+    $("backupStatus").textContent = "Copying the database…";
+    const res = await fetch(`${BASE}/api/admin/db?gzip=1`, { headers: adminHeaders() });
+    if (!res.ok) throw new Error("Download failed");
+    const url = URL.createObjectURL(await res.blob());
+    const a = document.createElement("a");
+    a.href = url;
+    a.download = `bakeoff-${new Date().toISOString().slice(0, 10)}.sqlite3.gz`;
+    a.click();
+    URL.revokeObjectURL(url);
+    $("backupStatus").textContent = "";
+  }
+
+  async function compactDb() {
+    const res = await fetch(`${BASE}/api/admin/maintenance`, { method: "POST", headers: adminHeaders() });
+    const data = await res.json();
+    if (!res.ok || !data.success) throw new Error(data.error || "Compaction failed");
+    const r = data.report;
+    const kb = (n) => Math.round(n / 1024);
+    $("backupStatus").textContent = `Archived ${r.archived} old events; database ${kb(r.bytes_before)} → ${kb(r.bytes_after)} KB ✅`;
+  }
+
+  function renderScoring(data) {
+    const select = $("scoringMode");
+    if (!select) return;
+    for (const opt of select.options) opt.disabled = !data.modes.includes(opt.value);
+    select.value = data.mode;
+    $("scoringTrim").value = data.trim;
+  }
+
+  async function loadScoring() {
+    const res = await fetch(`${BASE}/api/admin/scoring`, { headers: adminHeaders() });
+    const data = await res.json();
+    if (!res.ok || !data.success) throw new Error(data.error || "Could not load scoring settings");
+    renderScoring(data);
+  }
+
+  async function saveScoring() {
+    const res = await fetch(`${BASE}/api/admin/scoring`, {
+      method: "POST",
+      headers: adminHeaders({"Content-Type": "application/json"}),
+      body: JSON.stringify({ mode: $("scoringMode").value, trim: Number($("scoringTrim").value) }),
+    });
+    const data = await res.json();
+    if (!res.ok || !data.success) throw new Error(data.error || "Save failed");
+    renderScoring(data);
+    $("scoringStatus").textContent = "Saved — the leaderboard has been re-ranked ✅";
+  }
+
+  async function loadCompetitions() {
+    const res = await fetch("/api/competitions");
+    const data = await res.json();
+    $("competitionList").innerHTML = data.competitions.map(c =>
+      `<a href="${escapeHtml(c.url)}admin"${c.id === COMPETITION ? ' aria-current="page"' : ""}>${escapeHtml(c.name)}</a>`
+    ).join(" • ");
+  }
+
+  async function createCompetition() {
+    const res = await fetch("/api/admin/competitions", {
+      method: "POST",
+      headers: adminHeaders({"Content-Type": "application/json"}),
+      body: JSON.stringify({ id: $("competitionId").value, name: $("competitionName").value }),
+    });
+    const data = await res.json();
+    if (!res.ok || !data.success) throw new Error(data.error || "Could not create competition");
+    $("competitionId").value = $("competitionName").value = "";
+    $("competitionStatus").textContent = `Created — judges and viewers use ${location.origin}${data.url} ✅`;
+    await loadCompetitions();
+  }
+
+  let profilerTimer = null;
+  let profilerRunning = false;
+
+  function renderProfile(data) {
+    const p = data.profile;
+    profilerRunning = p.running;
+    const btn = $("profilerBtn");
+    if (btn) btn.textContent = p.running ? "⏹️ Stop profiler" : "▶️ Start profiler";
+    $("profilerStatus").textContent = p.samples
+      ? `${p.running ? "Sampling" : "Sampled"} worker ${data.pid}: ${p.samples} samples over ${p.seconds}s (every ${p.intervalMs} ms)`
+      : (p.running ? `Sampling worker ${data.pid}…` : "Profiler is off.");
+    const tbody = $("profileTbody");
+    if (tbody) {
+      tbody.innerHTML = p.top.map(r => `<tr>
+        <td><code>${escapeHtml(r.function)}</code></td>
+        <td class="col-tight">${escapeHtml(r.self)}</td>
+        <td class="col-tight">${escapeHtml(r.total)}</td>
+      </tr>`).join("");
+    }
+    clearTimeout(profilerTimer);
+    if (p.running) profilerTimer = setTimeout(() => refreshProfile().catch(() => {}), 2000);
+  }
+
+  async function refreshProfile(action) {
+    const res = await fetch("/api/admin/profiler", action ? {
+      method: "POST",
+      headers: adminHeaders({"Content-Type": "application/json"}),
+      body: JSON.stringify({ action }),
+    } : { headers: adminHeaders() });
+    const data = await res.json();
+    if (!res.ok || !data.success) throw new Error(data.error || "Profiler request failed");
+    renderProfile(data);
+    return data;
+  }
+
+  async function toggleProfiler() {
+    await refreshProfile(profilerRunning ? "stop" : "start");
+  }
+
+  async function downloadProfile() {
+    const res = await fetch("/api/admin/profiler/folded", { headers: adminHeaders() });
+    if (!res.ok) throw new Error("Download failed");
+    const url = URL.createObjectURL(await res.blob());
+    const a = document.createElement("a");
+    a.href = url;
+    a.download = `bakeoff-profile-${new Date().toISOString().slice(0, 19).replace(/:/g, "")}.folded`;
+    a.click();
+    URL.revokeObjectURL(url);
   }
 
   function openModal() {
@@ -83,6 +248,7 @@
     const data = await res.json();
     if (data.success) {
       unlocked = true;
+      adminPassword = pw;
       closeModal();
       await initAdmin();
     } else {
@@ -90,10 +256,38 @@
     }
   }
 
+  const FEED_SIZE = 30;
+  let feedItems = [];
+  let socket = null;
+
+  function renderFeed(items) {
+    const el = $("feed");
+    if (!el || !items.length) return;
+    feedItems = [...items.slice().reverse(), ...feedItems].slice(0, FEED_SIZE);
+    el.innerHTML = feedItems.map(i => `<div class="activity-item">
+        <div class="activity-line">${escapeHtml(i.text)}</div>
+        <div class="activity-sub">#${escapeHtml(i.seq)} • ${escapeHtml(i.kind)}</div>
+      </div>`).join("");
+  }
+
+  function connectFeed() {
+    if (!window.io || socket) return;
+    socket = document.body.hasAttribute("data-websocket-only") ? io({ transports: ["websocket"] }) : io();
+    socket.on("feed", (msg) => renderFeed(msg.items || []));
+    // rooms belong to a connection, so rejoin after every reconnect
+    socket.on("connect", () => socket.emit("subscribe", { competition: COMPETITION, rooms: ["admin"], password: adminPassword }));
+  }
+
   async function initAdmin() {
     state = await fetchState();
     renderTable(state.participants || []);
     showStatus("");
+    connectFeed();
+    refreshProfile().catch(() => {});
+    loadScoring().catch((err) => {
+      $("scoringStatus").textContent = `Error: ${err.message}`;
+    });
+    loadCompetitions().catch(() => {});
   }
 
   document.addEventListener("click", (e) => {
@@ -103,7 +297,7 @@
 
     if (btn.id === "addRowBtn") {
       const participants = readTable();
-      participants.push({ id: `p-${Date.now()}`, name: "", dessert: "—" });
+      participants.push({ id: null, name: "", dessert: "—" });
       renderTable(participants);
       showStatus("");
       return;
@@ -114,14 +308,80 @@
         try {
           const participants = readTable();
           await saveParticipants(participants);
+          // pick up the ids assigned to newly added rows
+          state = await fetchState();
+          renderTable(state.participants || []);
           showStatus("Saved ✅");
         } catch (err) {
-          showStatus("Error saving. Try again.");
+          showStatus(`Error saving: ${err.message}`);
         }
       })();
       return;
     }
 
+    if (btn.id === "exportBtn") {
+      exportData().catch((err) => {
+        $("backupStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "backupBtn") {
+      createBackup().catch((err) => {
+        $("backupStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "downloadDbBtn") {
+      downloadDb().catch((err) => {
+        $("backupStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "compactBtn") {
+      compactDb().catch((err) => {
+        $("backupStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "saveScoringBtn") {
+      saveScoring().catch((err) => {
+        $("scoringStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "createCompetitionBtn") {
+      createCompetition().catch((err) => {
+        $("competitionStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "profilerBtn") {
+      toggleProfiler().catch((err) => {
+        $("profilerStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "profileDownloadBtn") {
+      downloadProfile().catch((err) => {
+        $("profilerStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
+    if (btn.id === "importBtn") {
+      importBackup().catch((err) => {
+        $("backupStatus").textContent = `Error: ${err.message}`;
+      });
+      return;
+    }
+
     if (action === "remove") {
       const tr = btn.closest("tr");
       if (!tr) return;
@@ -1,5 +1,8 @@
 (() => {
   const $ = (id) => document.getElementById(id);
+  // Served at / for the default competition and at /c/<id>/ for the others; the API lives under the same prefix.
+  const BASE = document.body.dataset.base || "";
+  const COMPETITION = document.body.dataset.competition || "default";
 
   const tasteRange = $("tasteRange");
   const presentationRange = $("presentationRange");
@@ -19,16 +22,7 @@
   const activityEl = $("activity");
   const submitStatus = $("submitStatus");
 
-  const EMOJI = {
-    taste: ["🤢","😖","😕","😐","🙂","😋","🤤","😍","🎉","🏆"],
-    presentation: ["🫥","😬","😕","😐","🙂","✨","🎀","🎁","🌟","👑"],
-    spirit: ["🥶","😐","🙂","🎄","🕯️","🎅","🤶","🦌","❄️","🎆"],
-  };
-
-  function scoreEmoji(kind, score) {
-    const idx = Math.min(10, Math.max(1, Number(score || 1))) - 1;
-    return (EMOJI[kind] && EMOJI[kind][idx]) || "🙂";
-  }
+  const { KeyedList, schedule, scoreEmoji, participantLabel, leaderRow, rosterRow, activityRow } = window.BakeoffRender;
 
   function setSliderUI() {
     if (tasteRange) {
@@ -51,46 +45,31 @@
     spiritRange?.addEventListener(evt, setSliderUI);
   });
 
-  function fmt(n) {
-    const x = Number(n);
-    if (!Number.isFinite(x)) return "0.00";
-    return x.toFixed(2);
-  }
-
-  function participantLabel(p) {
-    const d = (p.dessert || "—").trim();
-    return d && d !== "—" ? `${p.name} — ${d}` : p.name;
-  }
+  // Each list keeps one element per participant or score and only rebuilds the rows that changed.
+  const leaderboardList = leaderboardEl && new KeyedList(leaderboardEl, {
+    key: r => r.id,
+    html: leaderRow,
+    empty: `<div class="muted">Add participants in Admin to begin 🎅</div>`,
+    animate: true,  // a change of place slides the row there
+  });
+  const rosterList = rosterEl && new KeyedList(rosterEl, { key: p => p.id, html: rosterRow });
+  const activityList = activityEl && new KeyedList(activityEl, {
+    key: s => s.id,
+    html: s => activityRow(s, s.who),
+    empty: `<div class="muted">No scores yet — start judging! 🎄</div>`,
+  });
 
   function renderRoster(participants) {
-    if (!rosterEl) return;
-    rosterEl.innerHTML = participants.map(p => {
-      const dessert = (p.dessert || "—").trim();
-      return `<div class="roster-item">
-        <div class="roster-name">${escapeHtml(p.name)}</div>
-        <div class="roster-dessert">${escapeHtml(dessert)}</div>
-      </div>`;
-    }).join("");
+    rosterList?.update(participants);
   }
 
   function renderActivity(participantsById, scores) {
-    if (!activityEl) return;
-    const recent = [...scores].slice(-10).reverse();
-    activityEl.innerHTML = recent.map(s => {
+    if (!activityList) return;
+    const recent = scores.slice(-activityLimit).reverse().map(s => {
       const p = participantsById[s.participantId];
-      const who = p ? participantLabel(p) : s.participantId;
-      const line = `${escapeHtml(s.judge || "Judge")} → ${escapeHtml(who)}`;
-      const breakdown = `🍪 ${s.taste} ${scoreEmoji("taste", s.taste)}  •  🎁 ${s.presentation} ${scoreEmoji("presentation", s.presentation)}  •  ✨ ${s.spirit} ${scoreEmoji("spirit", s.spirit)}`;
-      const comment = (s.comments || "").trim();
-      return `<div class="activity-item">
-        <div class="activity-top">
-          <div class="activity-line">${line}</div>
-          <div class="activity-total">🏅 ${fmt(s.total)}</div>
-        </div>
-        <div class="activity-sub">${breakdown}</div>
-        ${comment ? `<div class="activity-comment">“${escapeHtml(comment)}”</div>` : ""}
-      </div>`;
-    }).join("") || `<div class="muted">No scores yet — start judging! 🎄</div>`;
+      return { ...s, who: p ? participantLabel(p) : s.participantId };
+    });
+    activityList.update(recent);
   }
 
   function aggregate(participants, scores) {
@@ -124,93 +103,229 @@
     return rows;
   }
 
-  function renderLeaderboard(participants, scores) {
-    if (!leaderboardEl) return;
-
-    const rows = aggregate(participants, scores);
-    if (!rows.length) {
-      leaderboardEl.innerHTML = `<div class="muted">Add participants in Admin to begin 🎅</div>`;
-      return;
-    }
-
-    leaderboardEl.innerHTML = rows.map((r, idx) => {
-      const medal = idx === 0 ? "🥇" : idx === 1 ? "🥈" : idx === 2 ? "🥉" : "🎄";
-      const dessert = (r.dessert || "—").trim();
-      const subtitle = dessert && dessert !== "—" ? `${escapeHtml(dessert)}` : "—";
-      return `<div class="leader-row">
-        <div class="leader-rank">${medal}</div>
-        <div class="leader-main">
-          <div class="leader-name">${escapeHtml(r.name)}</div>
-          <div class="leader-sub">${subtitle}</div>
-          <div class="badges">
-            <span class="badge">🍪 ${fmt(r.avgTaste)} ${scoreEmoji("taste", Math.round(r.avgTaste || 1))}</span>
-            <span class="badge">🎁 ${fmt(r.avgPresentation)} ${scoreEmoji("presentation", Math.round(r.avgPresentation || 1))}</span>
-            <span class="badge">✨ ${fmt(r.avgSpirit)} ${scoreEmoji("spirit", Math.round(r.avgSpirit || 1))}</span>
-          </div>
-        </div>
-        <div class="leader-score">
-          <div class="leader-total">🏅 ${fmt(r.avgTotal)}</div>
-          <div class="leader-count">${r.count} vote${r.count === 1 ? "" : "s"}</div>
-        </div>
-      </div>`;
-    }).join("");
+  function renderLeaderboard(participants, scores, ranked) {
+    // The server keeps running averages; only fall back to aggregating here for older payloads.
+    leaderboardList?.update(ranked || aggregate(participants, scores));
   }
 
+  let pendingParticipants = null;
+
   function populateParticipants(participants) {
     if (!participantSelect) return;
-    participantSelect.innerHTML = participants.map(p => {
-      return `<option value="${escapeAttr(p.id)}">${escapeHtml(participantLabel(p))}</option>`;
-    }).join("");
+    // Never rebuild the list under a judge who is picking from it; catch up once they're done.
+    if (document.activeElement === participantSelect) {
+      pendingParticipants = participants;
+      return;
+    }
+    pendingParticipants = null;
+    const existing = new Map([...participantSelect.options].map(o => [o.value, o]));
+    const wanted = new Set(participants.map(p => String(p.id)));
+    existing.forEach((opt, id) => { if (!wanted.has(id)) opt.remove(); });
+    participants.forEach((p, idx) => {
+      const id = String(p.id);
+      let opt = existing.get(id);
+      if (!opt) opt = new Option("", id);
+      const label = participantLabel(p);
+      if (opt.text !== label) opt.text = label;
+      if (participantSelect.options[idx] !== opt) participantSelect.add(opt, idx);
+    });
   }
 
-  function escapeHtml(s) {
-    return String(s ?? "").replace(/[&<>"']/g, (c) => ({
-      "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"
-    }[c]));
-  }
-  function escapeAttr(s) { return escapeHtml(s).replace(/"/g, "&quot;"); }
+  participantSelect?.addEventListener("blur", () => {
+    if (pendingParticipants) populateParticipants(pendingParticipants);
+  });
 
+  const ACTIVITY_SIZE = 10;  // scores fetched with the state, and per "Show older" page
+  let activityLimit = ACTIVITY_SIZE;
   let latestState = null;
+  let scoreIds = new Set();
+  let seen = {};  // newest seq applied per live event, so a late tick from another worker can't roll back
+
+  // ?view=judge is just the score form (no big-screen traffic); ?view=board is just the displays
+  const VIEW = new URLSearchParams(location.search).get("view") || "all";
+  const ROOMS = VIEW === "judge" ? [] : ["leaderboard", "activity"];
+
+  function participantsById() {
+    return Object.fromEntries((latestState.participants || []).map(p => [p.id, p]));
+  }
 
   function renderAll(state) {
     latestState = state;
-    const participants = state.participants || [];
-    const scores = state.scores || [];
-    const byId = Object.fromEntries(participants.map(p => [p.id, p]));
+    state.participants = state.participants || [];
+    state.scores = state.scores || [];
+    const participants = state.participants;
+    const scores = state.scores;
+    const byId = participantsById();
+    scoreIds = new Set(scores.map(s => s.id));
+    activityLimit = ACTIVITY_SIZE;
+    const olderBtn = $("olderBtn");
+    if (olderBtn) olderBtn.hidden = scores.length < ACTIVITY_SIZE;
+    seen = { participants: state.seq || 0, leaderboard: state.seq || 0 };
+
+    schedule("participants", () => populateParticipants(participants));
+    schedule("leaderboard", () => renderLeaderboard(participants, scores, state.leaderboard));
+    schedule("roster", () => renderRoster(participants));
+    schedule("activity", () => renderActivity(byId, scores));
+  }
 
-    populateParticipants(participants);
-    renderLeaderboard(participants, scores);
-    renderRoster(participants);
-    renderActivity(byId, scores);
+  function fresh(kind, msg) {
+    if ((msg.seq || 0) < (seen[kind] || 0)) return false;
+    seen[kind] = msg.seq || 0;
+    return true;
   }
 
+  // Live updates, coalesced by the server into a few ticks per second. Each one is a whole value
+  // (ranking, roster) or scores keyed by id, so a missed tick is repaired by the next. State is
+  // updated as they arrive; the DOM at most once a frame (schedule), from the newest state.
+  const HANDLERS = {
+    reset() {
+      // the data was replaced wholesale (e.g. an admin import); start over from a fresh copy
+      fetchState().then(renderAll);
+    },
+    participants(msg) {
+      if (!fresh("participants", msg)) return;
+      latestState.participants = msg.participants || [];
+      schedule("participants", () => populateParticipants(latestState.participants));
+      schedule("roster", () => renderRoster(latestState.participants));
+      schedule("activity", () => renderActivity(participantsById(), latestState.scores));
+    },
+    leaderboard(msg) {
+      if (!fresh("leaderboard", msg)) return;
+      latestState.leaderboard = msg.rows || [];
+      schedule("leaderboard", () => renderLeaderboard(latestState.participants, latestState.scores, latestState.leaderboard));
+    },
+    scores(msg) {
+      const added = (msg.scores || []).filter(s => !scoreIds.has(s.id));
+      if (!added.length) return;
+      const scores = latestState.scores;
+      const outOfOrder = scores.length && added[0].id < scores[scores.length - 1].id;
+      added.forEach(s => { scoreIds.add(s.id); scores.push(s); });
+      if (outOfOrder) scores.sort((a, b) => a.id - b.id);  // ticks from different workers can interleave
+      if (scores.length > activityLimit) scores.splice(0, scores.length - activityLimit);
+      schedule("activity", () => renderActivity(participantsById(), latestState.scores));
+    },
+  };
+
   async function fetchState() {
-    const res = await fetch("/api/state", { cache: "no-store" });
+    // "no-cache" revalidates with If-None-Match, so an unchanged state comes back as a bodyless 304
+    const res = await fetch(`${BASE}/api/state?scores=${ACTIVITY_SIZE}`, { cache: "no-cache" });
     return await res.json();
   }
 
   async function init() {
+    document.body.classList.add(`view-${VIEW}`);
     setSliderUI();
     const state = await fetchState();
     renderAll(state);
+    flushQueue();  // anything left over from a previous visit
 
     // Live updates
     if (window.io) {
-      const socket = io();
-      socket.on("update", (state) => renderAll(state));
+      // multi-worker deployments have no sticky sessions, so skip long-polling there
+      const socket = document.body.hasAttribute("data-websocket-only") ? io({ transports: ["websocket"] }) : io();
+      Object.keys(HANDLERS).forEach(event => {
+        socket.on(event, (msg) => { if (latestState) HANDLERS[event](msg || {}); });
+      });
+      // rooms belong to a connection: join on every (re)connect, and after a drop refetch what was missed
+      let connectedBefore = false;
+      socket.on("connect", () => {
+        flushQueue();
+        socket.emit("subscribe", { competition: COMPETITION, rooms: ROOMS });  // joins the competition even with no rooms
+        if (connectedBefore) fetchState().then(renderAll);
+        connectedBefore = true;
+      });
     }
   }
 
+  async function loadOlderScores() {
+    const scores = latestState.scores;
+    const params = new URLSearchParams({ limit: ACTIVITY_SIZE });
+    if (scores.length) params.set("before", scores[0].id);
+    const res = await fetch(`${BASE}/api/scores?${params}`);
+    const page = await res.json();
+    const older = (page.scores || []).filter(s => !scoreIds.has(s.id)).reverse();  // pages are newest-first
+    older.forEach(s => scoreIds.add(s.id));
+    latestState.scores = [...older, ...scores];
+    activityLimit = latestState.scores.length;
+    $("olderBtn").hidden = !page.next;
+    schedule("activity", () => renderActivity(participantsById(), latestState.scores));
+  }
+
+  $("olderBtn")?.addEventListener("click", () => loadOlderScores().catch(() => {}));
+
   $("refreshBtn")?.addEventListener("click", async () => {
     const state = await fetchState();
     renderAll(state);
   });
 
+  // ---- Offline queue ----
+  // Scores are queued in localStorage first and sent in batches, so a dropped connection
+  // never loses one; the clientId makes a resend after a lost response harmless.
+  const QUEUE_KEY = COMPETITION === "default" ? "bakeoff-score-queue" : `bakeoff-score-queue:${COMPETITION}`;
+  const BATCH_SIZE = 50;
+  const RETRY_MS = 15000;
+  let flushing = false;
+
+  function loadQueue() {
+    try { return JSON.parse(localStorage.getItem(QUEUE_KEY) || "[]"); } catch (err) { return []; }
+  }
+  function saveQueue(queue) {
+    try { localStorage.setItem(QUEUE_KEY, JSON.stringify(queue)); } catch (err) { /* private mode: memory only */ }
+  }
+  let scoreQueue = loadQueue();
+
+  function newClientId() {
+    if (window.crypto?.randomUUID) return crypto.randomUUID();
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+  }
+
+  function showQueued() {
+    const n = scoreQueue.length;
+    if (n) submitStatus.textContent = `Saved on this device — ${n} score${n === 1 ? "" : "s"} will send when the connection is back 📶`;
+  }
+
+  async function flushQueue() {
+    if (flushing || !scoreQueue.length) return;
+    flushing = true;
+    try {
+      while (scoreQueue.length) {
+        const batch = scoreQueue.slice(0, BATCH_SIZE);
+        const res = await fetch(`${BASE}/api/scores/batch`, {
+          method: "POST",
+          headers: {"Content-Type":"application/json"},
+          body: JSON.stringify({ scores: batch }),
+        });
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);  // server trouble: keep everything and retry later
+        const data = await res.json();
+        const done = new Set();
+        const messages = [];
+        (data.results || []).forEach(r => {
+          done.add(r.clientId);  // accepted or rejected for good (e.g. already scored); either way it's settled
+          messages.push(r.success ? `Submitted! Total: ${r.total} 🎄` : `Error: ${r.error}`);
+        });
+        scoreQueue = loadQueue().filter(q => !done.has(q.clientId));
+        saveQueue(scoreQueue);
+        if (messages.length) submitStatus.textContent = messages.length === 1 ? messages[0] : `${messages.length} queued scores sent 🎄`;
+        if (!done.size) break;
+      }
+      // if sockets aren't working, pull latest
+      if (!window.io) renderAll(await fetchState());
+    } catch (err) {
+      showQueued();
+    } finally {
+      flushing = false;
+    }
+  }
+
+  window.addEventListener("online", flushQueue);
+  setInterval(flushQueue, RETRY_MS);
+
   $("scoreForm")?.addEventListener("submit", async (e) => {
     e.preventDefault();
     submitStatus.textContent = "";
 
     const payload = {
+      clientId: newClientId(),
       judge: $("judge").value.trim(),
       participantId: participantSelect.value,
       taste: Number(tasteRange.value),
@@ -224,31 +339,17 @@
       return;
     }
 
-    try {
-      const res = await fetch("/api/score", {
-        method: "POST",
-        headers: {"Content-Type":"application/json"},
-        body: JSON.stringify(payload),
-      });
-      const data = await res.json();
-      if (!res.ok || !data.success) throw new Error(data.error || "Failed");
-      submitStatus.textContent = `Submitted! Total: ${data.total} 🎄`;
+    scoreQueue = [...loadQueue(), payload];
+    saveQueue(scoreQueue);
 
-      // reset sliders (keep judge name)
-      $("comments").value = "";
-      tasteRange.value = "5";
-      presentationRange.value = "5";
-      spiritRange.value = "5";
-      setSliderUI();
+    // reset sliders (keep judge name); the score is safe in the queue
+    $("comments").value = "";
+    tasteRange.value = "5";
+    presentationRange.value = "5";
+    spiritRange.value = "5";
+    setSliderUI();
 
-      // if sockets aren't working, pull latest
-      if (!window.io) {
-        const state = await fetchState();
-        renderAll(state);
-      }
-    } catch (err) {
-      submitStatus.textContent = `Error: ${err.message}`;
-    }
+    await flushQueue();
   });
 
   document.addEventListener("DOMContentLoaded", init);
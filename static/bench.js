@@ -0,0 +1,177 @@
+(() => {
+  // Replays a synthetic live event (re-ranked leaderboard and new scores several times a second)
+  // through two renderers and reports frame times: "full rebuild" redraws both lists with innerHTML
+  // on every update, as app.js used to; "keyed" is what app.js does now (render.js).
+  const $ = (id) => document.getElementById(id);
+  const { KeyedList, schedule, participantLabel, leaderRow, activityRow } = window.BakeoffRender;
+
+  const NAMES = ["Holly", "Noel", "Ivy", "Jack", "Carol", "Nick", "Eve", "Gabe", "Joy", "Mary", "Rudy", "Star"];
+  const DESSERTS = ["Yule log", "Gingerbread", "Panettone", "Stollen", "Mince pie", "Pavlova", "Fruitcake", "Trifle"];
+
+  function percentile(sorted, p) {
+    if (!sorted.length) return 0;
+    return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+  }
+
+  function makeEvent(participants) {
+    const people = Array.from({ length: participants }, (_, i) => ({
+      id: i + 1,
+      name: `${NAMES[i % NAMES.length]} ${Math.floor(i / NAMES.length) + 1}`,
+      dessert: DESSERTS[i % DESSERTS.length],
+      sums: { taste: 0, presentation: 0, spirit: 0, total: 0 },
+      count: 0,
+    }));
+    let scoreId = 0;
+    return {
+      people,
+      // One live tick: a few new scores, so a few averages change and the ranking is recomputed.
+      tick() {
+        const scores = [];
+        for (let n = 1 + Math.floor(Math.random() * 3); n > 0; n--) {
+          const p = people[Math.floor(Math.random() * people.length)];
+          const s = {
+            id: ++scoreId,
+            participantId: p.id,
+            judge: NAMES[scoreId % NAMES.length],
+            taste: 1 + Math.floor(Math.random() * 10),
+            presentation: 1 + Math.floor(Math.random() * 10),
+            spirit: 1 + Math.floor(Math.random() * 10),
+            comments: scoreId % 4 ? "" : "Festive and delicious!",
+          };
+          s.total = (s.taste + s.presentation + s.spirit) / 3;
+          ["taste", "presentation", "spirit", "total"].forEach(k => { p.sums[k] += s[k]; });
+          p.count += 1;
+          scores.push(s);
+        }
+        const rows = people.map(p => {
+          const c = Math.max(1, p.count);
+          return {
+            id: p.id, name: p.name, dessert: p.dessert, count: p.count,
+            avgTaste: p.sums.taste / c, avgPresentation: p.sums.presentation / c,
+            avgSpirit: p.sums.spirit / c, avgTotal: p.sums.total / c,
+          };
+        });
+        rows.sort((x, y) => (y.avgTotal - x.avgTotal) || (y.count - x.count));
+        return { rows, scores };
+      },
+    };
+  }
+
+  function freshContainer(id) {
+    // a clean element per run, so nothing (listeners, rows) carries over from the previous one
+    const old = $(id);
+    const el = old.cloneNode(false);
+    old.replaceWith(el);
+    return el;
+  }
+
+  const RENDERERS = {
+    rebuild(leaderboardEl, activityEl) {
+      return (rows, recent) => {
+        leaderboardEl.innerHTML = rows.map(leaderRow).join("");
+        activityEl.innerHTML = recent.map(s => activityRow(s, s.who)).join("");
+      };
+    },
+    keyed(leaderboardEl, activityEl) {
+      const leaderboard = new KeyedList(leaderboardEl, { key: r => r.id, html: leaderRow, animate: true });
+      const activity = new KeyedList(activityEl, { key: s => s.id, html: s => activityRow(s, s.who) });
+      return (rows, recent) => {
+        leaderboard.update(rows);
+        activity.update(recent);
+      };
+    },
+  };
+
+  function run(mode, { participants, activitySize, rate, seconds }) {
+    return new Promise(resolve => {
+      const leaderboardEl = freshContainer("leaderboard");
+      const activityEl = freshContainer("activity");
+      const render = RENDERERS[mode](leaderboardEl, activityEl);
+      const event = makeEvent(participants);
+      const byId = Object.fromEntries(event.people.map(p => [p.id, p]));
+      let recent = [];
+      const frames = [];
+      const renders = [];
+      let updates = 0;
+      let last = 0;
+      let done = false;
+
+      function timed(rows, items) {
+        const started = performance.now();
+        render(rows, items);
+        renders.push(performance.now() - started);
+      }
+
+      function onTick() {
+        const { rows, scores } = event.tick();
+        updates += 1;
+        const added = scores.map(s => ({ ...s, who: participantLabel(byId[s.participantId]) })).reverse();
+        recent = [...added, ...recent].slice(0, activitySize);
+        const items = recent;
+        if (mode === "keyed") schedule("bench", () => timed(rows, items));  // at most once a frame
+        else timed(rows, items);  // every update, straight away
+      }
+
+      function onFrame(t) {
+        if (last) frames.push(t - last);
+        last = t;
+        if (!done) requestAnimationFrame(onFrame);
+      }
+
+      requestAnimationFrame(onFrame);
+      const timer = setInterval(onTick, 1000 / rate);
+      setTimeout(() => {
+        clearInterval(timer);
+        done = true;
+        frames.sort((a, b) => a - b);
+        renders.sort((a, b) => a - b);
+        resolve({
+          mode,
+          updates,
+          frames: frames.length,
+          p50: percentile(frames, 0.5),
+          p95: percentile(frames, 0.95),
+          p99: percentile(frames, 0.99),
+          max: frames[frames.length - 1] || 0,
+          long: frames.filter(f => f > 50).length,
+          render95: percentile(renders, 0.95),
+          nodes: leaderboardEl.getElementsByTagName("*").length + activityEl.getElementsByTagName("*").length,
+        });
+      }, seconds * 1000);
+    });
+  }
+
+  function showResult(r) {
+    const ms = (x) => `${x.toFixed(1)} ms`;
+    $("benchResults").insertAdjacentHTML("beforeend", `<tr>
+      <td>${r.mode === "keyed" ? "Keyed" : "Full rebuild"}</td><td>${r.updates}</td><td>${r.frames}</td>
+      <td>${ms(r.p50)}</td><td>${ms(r.p95)}</td><td>${ms(r.p99)}</td><td>${ms(r.max)}</td>
+      <td>${r.long}</td><td>${ms(r.render95)}</td><td>${r.nodes}</td>
+    </tr>`);
+  }
+
+  function settings() {
+    const n = (id) => Math.max(1, Number($(id).value) || 1);
+    return { participants: n("benchParticipants"), activitySize: n("benchActivity"), rate: n("benchRate"), seconds: n("benchSeconds") };
+  }
+
+  let running = false;
+
+  async function runModes(modes) {
+    if (running) return;
+    running = true;
+    try {
+      for (const mode of modes) {
+        $("benchStatus").textContent = `Running ${mode}… keep this tab in front.`;
+        showResult(await run(mode, settings()));
+      }
+      $("benchStatus").textContent = "Done. 16.7 ms per frame is 60 fps; frames over 50 ms are visible stutter.";
+    } finally {
+      running = false;
+    }
+  }
+
+  $("runRebuildBtn").addEventListener("click", () => runModes(["rebuild"]));
+  $("runKeyedBtn").addEventListener("click", () => runModes(["keyed"]));
+  $("runBothBtn").addEventListener("click", () => runModes(["rebuild", "keyed"]));
+})();
@@ -0,0 +1,277 @@
+// Rendering helpers shared by app.js and the client benchmark (bench.html): row templates,
+// a keyed list that only touches the rows that changed, and one-update-per-frame batching.
+window.BakeoffRender = (() => {
+  const VIRTUAL_ROWS = 60;  // lists this long only keep the rows in view in the DOM
+  const OVERSCAN = 6;       // extra rows rendered above and below the visible ones
+  const MOVE_MS = 350;
+  const reducedMotion = window.matchMedia?.("(prefers-reduced-motion: reduce)");
+
+  const EMOJI = {
+    taste: ["🤢","😖","😕","😐","🙂","😋","🤤","😍","🎉","🏆"],
+    presentation: ["🫥","😬","😕","😐","🙂","✨","🎀","🎁","🌟","👑"],
+    spirit: ["🥶","😐","🙂","🎄","🕯️","🎅","🤶","🦌","❄️","🎆"],
+  };
+
+  function scoreEmoji(kind, score) {
+    const idx = Math.min(10, Math.max(1, Number(score || 1))) - 1;
+    return (EMOJI[kind] && EMOJI[kind][idx]) || "🙂";
+  }
+
+  function fmt(n) {
+    const x = Number(n);
+    if (!Number.isFinite(x)) return "0.00";
+    return x.toFixed(2);
+  }
+
+  function escapeHtml(s) {
+    return String(s ?? "").replace(/[&<>"']/g, (c) => ({
+      "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"
+    }[c]));
+  }
+
+  function participantLabel(p) {
+    const d = (p.dessert || "—").trim();
+    return d && d !== "—" ? `${p.name} — ${d}` : p.name;
+  }
+
+  // ---- Row templates ----
+  function leaderRow(r, idx) {
+    const medal = idx === 0 ? "🥇" : idx === 1 ? "🥈" : idx === 2 ? "🥉" : "🎄";
+    const dessert = (r.dessert || "—").trim();
+    const subtitle = dessert && dessert !== "—" ? `${escapeHtml(dessert)}` : "—";
+    return `<div class="leader-row">
+      <div class="leader-rank">${medal}</div>
+      <div class="leader-main">
+        <div class="leader-name">${escapeHtml(r.name)}</div>
+        <div class="leader-sub">${subtitle}</div>
+        <div class="badges">
+          <span class="badge">🍪 ${fmt(r.avgTaste)} ${scoreEmoji("taste", Math.round(r.avgTaste || 1))}</span>
+          <span class="badge">🎁 ${fmt(r.avgPresentation)} ${scoreEmoji("presentation", Math.round(r.avgPresentation || 1))}</span>
+          <span class="badge">✨ ${fmt(r.avgSpirit)} ${scoreEmoji("spirit", Math.round(r.avgSpirit || 1))}</span>
+        </div>
+      </div>
+      <div class="leader-score">
+        <div class="leader-total">🏅 ${fmt(r.avgTotal)}</div>
+        <div class="leader-count">${r.count} vote${r.count === 1 ? "" : "s"}${r.rankSpread
+          ? ` <span title="Place moves by up to ${r.rankSpread} if any one judge is left out">±${r.rankSpread}</span>` : ""}</div>
+      </div>
+    </div>`;
+  }
+
+  function rosterRow(p) {
+    const dessert = (p.dessert || "—").trim();
+    return `<div class="roster-item">
+      <div class="roster-name">${escapeHtml(p.name)}</div>
+      <div class="roster-dessert">${escapeHtml(dessert)}</div>
+    </div>`;
+  }
+
+  function activityRow(s, who) {
+    const line = `${escapeHtml(s.judge || "Judge")} → ${escapeHtml(who)}`;
+    const breakdown = `🍪 ${s.taste} ${scoreEmoji("taste", s.taste)}  •  🎁 ${s.presentation} ${scoreEmoji("presentation", s.presentation)}  •  ✨ ${s.spirit} ${scoreEmoji("spirit", s.spirit)}`;
+    const comment = (s.comments || "").trim();
+    return `<div class="activity-item">
+      <div class="activity-top">
+        <div class="activity-line">${line}</div>
+        <div class="activity-total">🏅 ${fmt(s.total)}</div>
+      </div>
+      <div class="activity-sub">${breakdown}</div>
+      ${comment ? `<div class="activity-comment">“${escapeHtml(comment)}”</div>` : ""}
+    </div>`;
+  }
+
+  // ---- Frame batching ----
+  // Live updates can arrive several times a frame; each named job runs once, on the next frame,
+  // with whatever state is newest by then. A hidden tab runs nothing until it is shown again.
+  const jobs = new Map();
+  let frame = 0;
+
+  function schedule(name, fn) {
+    jobs.set(name, fn);
+    if (!frame) frame = requestAnimationFrame(flush);
+  }
+
+  function flush() {
+    frame = 0;
+    const run = [...jobs.values()];
+    jobs.clear();
+    run.forEach(fn => fn());
+  }
+
+  // ---- Keyed lists ----
+  const template = document.createElement("template");
+
+  function build(html) {
+    template.innerHTML = html.trim();
+    return template.content.firstElementChild;
+  }
+
+  class KeyedList {
+    /**
+     * Renders items into `el`, one element per key. A row is rebuilt only when its HTML changed,
+     * and rows are moved, not recreated, when the order changes. With `animate`, moved rows slide
+     * from their old place (FLIP). From VIRTUAL_ROWS items on, the list scrolls inside `el` and
+     * only the rows in view (plus OVERSCAN) are in the DOM, absolutely positioned.
+     */
+    constructor(el, { key, html, empty = "", animate = false, virtualAt = VIRTUAL_ROWS }) {
+      this.el = el;
+      this.key = key;
+      this.html = html;
+      this.empty = empty;
+      this.animate = animate;
+      this.virtualAt = virtualAt;
+      this.rows = new Map();  // key -> { el, html }
+      this.items = [];
+      this.virtual = false;
+      this.heights = new Map();  // measured row heights (virtual mode), by key
+      this.spacer = null;
+      this.showingEmpty = false;
+      el.addEventListener("scroll", () => {
+        if (this.virtual) schedule(this, () => this.layout());
+      }, { passive: true });
+    }
+
+    update(items) {
+      this.items = items;
+      if (!items.length) {
+        this.reset();
+        this.el.innerHTML = this.empty;
+        this.showingEmpty = true;
+        return;
+      }
+      if (this.showingEmpty) {
+        this.el.innerHTML = "";
+        this.showingEmpty = false;
+      }
+      const virtual = items.length >= this.virtualAt;
+      if (virtual !== this.virtual) {
+        this.reset();
+        this.virtual = virtual;
+        this.el.classList.toggle("virtual", virtual);
+        if (virtual) this.spacer = this.el.appendChild(build(`<div class="virtual-spacer"></div>`));
+      }
+      if (this.heights.size > 2 * items.length) {
+        const live = new Set(items.map(this.key));
+        this.heights.forEach((_, k) => { if (!live.has(k)) this.heights.delete(k); });
+      }
+      if (this.virtual) this.layout();
+      else this.patch();
+    }
+
+    reset() {
+      this.rows.forEach(row => row.el.remove());
+      this.rows.clear();
+      this.heights.clear();
+      this.spacer?.remove();
+      this.spacer = null;
+      this.virtual = false;
+      this.el.classList.remove("virtual");
+    }
+
+    row(item, idx) {
+      // The row for `item`, created or rebuilt only if its HTML is new.
+      const k = this.key(item);
+      const html = this.html(item, idx);
+      let row = this.rows.get(k);
+      if (!row) {
+        row = { el: build(html), html };
+        this.rows.set(k, row);
+      } else if (row.html !== html) {
+        const el = build(html);
+        el.style.transform = row.el.style.transform;
+        if (row.el.parentNode) row.el.replaceWith(el);
+        row.el = el;
+        row.html = html;
+      }
+      return row;
+    }
+
+    patch() {
+      const animate = this.animate && !reducedMotion?.matches && this.rows.size > 0;
+      const before = new Map();
+      if (animate) this.rows.forEach((row, k) => before.set(k, row.el.getBoundingClientRect().top));
+
+      const keep = new Set(this.items.map(this.key));
+      this.rows.forEach((row, k) => {
+        if (!keep.has(k)) { row.el.remove(); this.rows.delete(k); }
+      });
+      let cursor = this.el.firstElementChild;
+      this.items.forEach((item, idx) => {
+        const prev = this.rows.get(this.key(item))?.el;
+        const { el } = this.row(item, idx);
+        if (prev === cursor && prev !== el) cursor = el;  // rebuilt in place
+        if (el === cursor) cursor = cursor.nextElementSibling;
+        else this.el.insertBefore(el, cursor);
+      });
+
+      if (!animate) return;
+      const moved = [];
+      before.forEach((top, k) => {
+        const row = this.rows.get(k);
+        const dy = row ? top - row.el.getBoundingClientRect().top : 0;
+        if (Math.abs(dy) < 1) return;
+        row.el.style.transition = "none";
+        row.el.style.transform = `translateY(${dy}px)`;
+        moved.push(row.el);
+      });
+      if (!moved.length) return;
+      this.el.offsetHeight;  // commit the inverted positions before letting them go
+      moved.forEach(el => {
+        el.style.transition = `transform ${MOVE_MS}ms ease`;
+        el.style.transform = "";
+      });
+    }
+
+    layout() {
+      const items = this.items;
+      const gap = parseFloat(getComputedStyle(this.el).rowGap) || 0;
+      const known = [...this.heights.values()];
+      const guess = known.length ? known.reduce((a, b) => a + b, 0) / known.length : 80;
+      for (let pass = 0; pass < 2; pass++) {
+        const tops = new Array(items.length + 1);
+        tops[0] = 0;
+        items.forEach((item, i) => { tops[i + 1] = tops[i] + (this.heights.get(this.key(item)) ?? guess) + gap; });
+        this.spacer.style.height = `${Math.max(0, tops[items.length] - gap)}px`;
+
+        const viewTop = this.el.scrollTop;
+        const viewBottom = viewTop + this.el.clientHeight;
+        const first = Math.max(0, firstAfter(tops, viewTop) - 1 - OVERSCAN);
+        const last = Math.min(items.length, firstAfter(tops, viewBottom) + OVERSCAN);
+
+        const visible = new Set();
+        const placed = [];
+        for (let i = first; i < last; i++) {
+          const k = this.key(items[i]);
+          visible.add(k);
+          const row = this.row(items[i], i);
+          row.el.style.transform = `translateY(${tops[i]}px)`;  // a row that changes place slides there (CSS)
+          if (!row.el.parentNode) this.el.appendChild(row.el);
+          placed.push([k, row.el]);
+        }
+        this.rows.forEach((row, k) => {
+          if (!visible.has(k)) { row.el.remove(); this.rows.delete(k); }
+        });
+
+        let changed = false;
+        placed.forEach(([k, el]) => {
+          const h = el.offsetHeight;
+          if (h && h !== this.heights.get(k)) { this.heights.set(k, h); changed = true; }
+        });
+        if (!changed) return;
+      }
+    }
+  }
+
+  function firstAfter(tops, y) {
+    // index of the first row starting below y (binary search over the running offsets)
+    let lo = 0, hi = tops.length - 1;
+    while (lo < hi) {
+      const mid = (lo + hi) >> 1;
+      if (tops[mid] <= y) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo;
+  }
+
+  return { KeyedList, schedule, scoreEmoji, fmt, escapeHtml, participantLabel, leaderRow, rosterRow, activityRow };
+})();